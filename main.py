@@ -10,4 +10,4 @@ def run(cmd):
 if __name__ == "__main__":
     run("python -m scripts.clean")
     run("python -m scripts.build_all")
-    print("✅ Done. CSV dans data/, PNG dans output/")
+    print("✅ Done. Tableaux .cols dans data/, PNG dans output/")
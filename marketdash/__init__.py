@@ -1,6 +1,18 @@
 # Makes "marketdash" a package and exposes public API
-from .providers import yf_history, te_history, te_get
-from .utils import compute_perf_table, load_yaml, ensure_dir, last_business_day
+from .providers import yf_history, yf_history_many, te_history, te_history_many, te_get, fred_history
+from .alerts import AlertEngine, AlertRule
+from .catalog import SeriesCatalog, get_catalog
+from .curves import fit_ns, fit_ns_cached, ns_yields
+from .derived import DerivedRegistry, add_derived
+from .frames import read_frame, write_frame
+from .fx import currency_of, translate_frame
+from .health import dead_symbols
+from .memo import configure_memo
+from .query import frame_panel, get_panel
+from .rolling import RollingMoments, rolling_stats
+from .scheduler import FetchScheduler, TokenBucket
+from .series import PriceSeries
+from .utils import compute_perf_table, compute_perf_history, load_yaml, ensure_dir, last_business_day
 """
 Package marketdash : config & outils internes.
 """
@@ -0,0 +1,306 @@
+"""
+Alertes sur les nouvelles observations du store.
+
+Règles déclarées dans config.yaml :
+
+    alerts:
+      rules:
+        - name: HY OAS +30bp / 5j
+          provider: fred
+          symbol: BAMLH0A0HYM2
+          type: change          # variation sur `periods` observations
+          periods: 5
+          threshold: 0.30       # > 0 : hausse >= seuil ; < 0 : baisse <= seuil
+        - name: Secteurs US 2 sigma
+          provider: yahoo
+          symbols: [XLK, XLF, XLE]
+          type: zscore          # rendement du jour vs `window` précédents
+          window: 63
+          threshold: 2.0
+        - name: VIX > 30
+          provider: yahoo
+          symbol: ^VIX
+          type: level
+          above: 30
+
+Chaque (règle, symbole) garde un petit état mis à jour en O(1) par
+observation (buffer circulaire + sommes glissantes), persisté dans
+`cache_dir/alerts_state.json`. Un run ne traite que les observations
+postérieures à la dernière vue ; au premier run l'historique sert
+d'amorçage, sans alerte.
+
+Seules les barres closes entrent dans l'état. Celles de la séance en cours
+(provisoires) sont évaluées sur une copie, non sauvegardée : la clôture
+définitive est poussée au run suivant. Une alerte levée sur une barre
+provisoire n'est pas répétée pour le même jour.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
+import copy, json, math, os, threading, time
+import numpy as np
+
+from .config import load_config
+from .series import PriceSeries, session_day
+from .store import get_store
+
+RULE_TYPES = ("level", "change", "zscore")
+# version du fichier d'état (2 : barres closes uniquement)
+STATE_VERSION = 2
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    name: str
+    provider: str
+    symbols: tuple[str, ...]
+    type: str = "zscore"
+    threshold: float = 2.0
+    window: int = 63
+    periods: int = 1
+    transform: str = "return"        # zscore : "return" (log) ou "diff"
+    above: float | None = None
+    below: float | None = None
+    min_periods: int = 20
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "AlertRule":
+        symbols = d.get("symbols") or ([d["symbol"]] if d.get("symbol") else [])
+        rule = cls(
+            name=str(d.get("name") or f"{d.get('type', 'zscore')}:{','.join(symbols)}"),
+            provider=str(d.get("provider", "yahoo")),
+            symbols=tuple(str(s) for s in symbols),
+            type=str(d.get("type", "zscore")),
+            threshold=float(d.get("threshold", 2.0)),
+            window=int(d.get("window", 63)),
+            periods=int(d.get("periods", 1)),
+            transform=str(d.get("transform", "return")),
+            above=None if d.get("above") is None else float(d["above"]),
+            below=None if d.get("below") is None else float(d["below"]),
+            min_periods=int(d.get("min_periods", min(20, int(d.get("window", 63))))),
+        )
+        if rule.type not in RULE_TYPES:
+            raise ValueError(f"Règle d'alerte '{rule.name}' : type inconnu {rule.type!r} ({RULE_TYPES})")
+        if not rule.symbols:
+            raise ValueError(f"Règle d'alerte '{rule.name}' : aucun symbole")
+        return rule
+
+
+class StreamState:
+    """Buffer circulaire de taille fixe + somme / somme des carrés glissantes."""
+    __slots__ = ("size", "buf", "pos", "n", "s1", "s2", "last", "last_day", "alerted_day",
+                 "restated_at")
+
+    def __init__(self, size: int):
+        self.size = max(1, int(size))
+        self.buf = [0.0] * self.size
+        self.pos = 0
+        self.n = 0
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.last: float | None = None      # dernier niveau vu
+        self.last_day: int | None = None
+        self.alerted_day: int | None = None  # jour déjà signalé sur barre provisoire
+        self.restated_at: float | None = None  # dernier ajustement du store reporté
+
+    def push(self, x: float) -> None:
+        if self.n == self.size:
+            old = self.buf[self.pos]
+            self.s1 -= old
+            self.s2 -= old * old
+        else:
+            self.n += 1
+        self.buf[self.pos] = x
+        self.s1 += x
+        self.s2 += x * x
+        self.pos = (self.pos + 1) % self.size
+
+    def oldest(self) -> float:
+        return self.buf[self.pos] if self.n == self.size else self.buf[0]
+
+    def mean_std(self) -> tuple[float, float]:
+        m = self.s1 / self.n
+        var = max(0.0, (self.s2 - self.n * m * m) / (self.n - 1)) if self.n > 1 else 0.0
+        return m, math.sqrt(var)
+
+    def scale(self, factor: float, levels: bool) -> None:
+        """
+        Reporte un ajustement rétroactif de la série : dernier niveau et,
+        si `levels`, observations du buffer (niveaux ou écarts absolus).
+        """
+        if self.last is not None:
+            self.last *= factor
+        if levels:
+            self.buf = [x * factor for x in self.buf]
+            self.s1 *= factor
+            self.s2 *= factor * factor
+
+    def to_dict(self) -> dict:
+        return {"size": self.size, "buf": self.buf, "pos": self.pos, "n": self.n,
+                "last": self.last, "last_day": self.last_day, "alerted_day": self.alerted_day,
+                "restated_at": self.restated_at}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "StreamState":
+        st = cls(d["size"])
+        st.buf, st.pos, st.n = list(d["buf"]), int(d["pos"]), int(d["n"])
+        st.last, st.last_day = d.get("last"), d.get("last_day")
+        st.alerted_day, st.restated_at = d.get("alerted_day"), d.get("restated_at")
+        # sommes recalculées au chargement : pas de dérive d'un run à l'autre
+        live = st.buf if st.n == st.size else st.buf[:st.n]
+        st.s1 = float(sum(live))
+        st.s2 = float(sum(x * x for x in live))
+        return st
+
+
+def _state_size(rule: AlertRule) -> int:
+    return {"level": 1, "change": rule.periods, "zscore": rule.window}[rule.type]
+
+
+def step(rule: AlertRule, st: StreamState, value: float) -> tuple[float, bool] | None:
+    """
+    Pousse une observation dans l'état ; renvoie (statistique, alerte ?)
+    quand la règle est évaluable, sinon None.
+    """
+    out = None
+    if rule.type == "level":
+        hit = (rule.above is not None and value > rule.above) or (rule.below is not None and value < rule.below)
+        out = (value, bool(hit))
+    elif rule.type == "change":
+        if st.n == st.size:
+            chg = value - st.oldest()
+            hit = chg >= rule.threshold if rule.threshold >= 0 else chg <= rule.threshold
+            out = (chg, bool(hit))
+        st.push(value)
+    else:  # zscore
+        if st.last is not None:
+            if rule.transform == "diff":
+                x = value - st.last
+            else:
+                x = math.log(value / st.last) if value > 0 and st.last > 0 else float("nan")
+            if not math.isnan(x):
+                if st.n >= rule.min_periods:
+                    m, sd = st.mean_std()
+                    if sd > 0:
+                        z = (x - m) / sd
+                        out = (z, abs(z) >= rule.threshold)
+                st.push(x)
+    st.last = value
+    return out
+
+
+class AlertEngine:
+    """Évalue des règles sur les observations nouvelles des séries du store."""
+
+    def __init__(self, rules: list[AlertRule], state_path: str | Path):
+        self.rules = rules
+        self.state_path = Path(state_path)
+        self._states: dict[str, StreamState] = {}
+        try:
+            raw = json.loads(self.state_path.read_text(encoding="utf-8"))
+            # ancien format (barres provisoires dans l'état) : ré-amorçage, sans alerte
+            if raw.get("version") == STATE_VERSION:
+                self._states = {k: StreamState.from_dict(v) for k, v in raw["states"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self._states = {}
+
+    @classmethod
+    def from_config(cls, cfg: dict | None = None) -> "AlertEngine":
+        cfg = cfg or load_config()
+        rules = [AlertRule.from_dict(d) for d in ((cfg.get("alerts") or {}).get("rules") or [])]
+        return cls(rules, Path(cfg["cache_dir"]) / "alerts_state.json")
+
+    @staticmethod
+    def _key(rule: AlertRule, symbol: str) -> str:
+        return f"{rule.name}|{rule.provider}:{symbol}"
+
+    def run(self, series: dict[tuple[str, str], PriceSeries] | None = None,
+            today=None) -> list[dict]:
+        """
+        Passe les observations nouvelles de chaque (règle, symbole) ; renvoie
+        les alertes déclenchées. Sans `series`, les séries sont lues dans le store.
+        Les barres datées de `today` (défaut : maintenant) ou après sont provisoires.
+        """
+        alerts = []
+        cut_day = session_day(today)
+        for rule in self.rules:
+            for symbol in rule.symbols:
+                s = (series or {}).get((rule.provider, symbol))
+                restated_at = None
+                if s is None:
+                    store = get_store(rule.provider)
+                    s, restated_at = store.load(symbol), store.meta(symbol).get("restated_at")
+                key = self._key(rule, symbol)
+                st = self._states.get(key)
+                # jamais d'observation vue : l'historique amorce l'état, sans alerte
+                priming = st is None or st.last_day is None or st.size != _state_size(rule)
+                if priming:
+                    st = self._states[key] = StreamState(_state_size(rule))
+                elif restated_at is not None and restated_at != st.restated_at:
+                    self._restate(rule, st, s)
+                st.restated_at = restated_at
+                start = 0 if st.last_day is None else int(np.searchsorted(s.days, st.last_day, side="right"))
+                cut = max(start, int(np.searchsorted(s.days, cut_day, side="left")))
+                # barres closes : état persisté ; barres provisoires : copie jetée après le run
+                for closed, lo, hi in ((True, start, cut), (False, cut, len(s.days))):
+                    if lo >= hi:
+                        continue
+                    cur = st if closed else copy.deepcopy(st)
+                    for day, value in zip(s.days[lo:hi].tolist(), s.values[lo:hi].tolist()):
+                        res = step(rule, cur, value)
+                        if res is None or not res[1] or priming or day == st.alerted_day:
+                            continue
+                        alerts.append({
+                            "date": str(np.datetime64(day, "D")),
+                            "rule": rule.name, "provider": rule.provider, "symbol": symbol,
+                            "type": rule.type, "value": round(value, 6), "stat": round(res[0], 6),
+                        })
+                        if not closed:
+                            st.alerted_day = day
+                    if closed:
+                        st.last_day = int(s.days[hi - 1])
+        self.save()
+        return alerts
+
+    @staticmethod
+    def _restate(rule: AlertRule, st: StreamState, s: PriceSeries) -> None:
+        """
+        Historique du store ajusté depuis le dernier run (dividende, split) :
+        l'état est remis à l'échelle du niveau stocké pour `last_day`, sinon
+        le premier écart après l'ajustement serait un faux signal.
+        """
+        i = int(np.searchsorted(s.days, st.last_day))
+        if i >= len(s.days) or s.days[i] != st.last_day or not st.last:
+            return
+        factor = float(s.values[i]) / st.last
+        if math.isfinite(factor) and factor != 1.0:
+            # change : niveaux ; zscore "diff" : écarts absolus ; "log" : invariant
+            st.scale(factor, rule.type == "change" or (rule.type == "zscore" and rule.transform == "diff"))
+
+    def reset(self) -> None:
+        """Oublie l'état de toutes les règles (ré-amorçage au prochain run)."""
+        self._states.clear()
+
+    def save(self) -> None:
+        p = self.state_path
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        states = {k: v.to_dict() for k, v in self._states.items()}
+        tmp.write_text(json.dumps({"version": STATE_VERSION, "states": states},
+                                  separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, p)
+
+
+def append_log(path: str | Path, alerts: list[dict], keep: int = 500) -> None:
+    """Ajoute `alerts` au journal JSON (les `keep` dernières sont conservées)."""
+    p = Path(path)
+    try:
+        log = json.loads(p.read_text(encoding="utf-8")).get("alerts", [])
+    except (OSError, ValueError, AttributeError):
+        log = []
+    log = (log + alerts)[-keep:]
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps({"updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "alerts": log},
+                              ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, p)
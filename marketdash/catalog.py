@@ -0,0 +1,159 @@
+"""
+Catalogue des séries du store (SQLite, `cache_dir/catalog.sqlite`).
+
+Une ligne par (namespace, symbole) : première / dernière date, nombre de
+points, derniers jours (témoins du recouvrement), couverture, dernier
+fetch et empreinte du contenu. Tenu à jour à chaque écriture du store :
+planification des fetchs, fraîcheur et refresh incrémental se décident
+sur une lecture de clé primaire, sans ouvrir les fichiers de données.
+
+Un store rempli avant le catalogue (ou modifié à la main) se resynchronise
+avec `get_catalog().rebuild(get_store(ns))`.
+"""
+from __future__ import annotations
+from pathlib import Path
+import hashlib, json, sqlite3, threading, time
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+from .series import PriceSeries
+
+# derniers jours gardés dans le catalogue (recouvrement des fetchs de queue)
+TAIL_DAYS = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    namespace       TEXT NOT NULL,
+    symbol          TEXT NOT NULL,
+    first_day       INTEGER,
+    last_day        INTEGER,
+    rows            INTEGER NOT NULL,
+    tail_days       TEXT NOT NULL,
+    covered_from    TEXT,
+    fetched_through TEXT,
+    fetched_at      REAL,
+    hash            TEXT NOT NULL,
+    updated_at      REAL NOT NULL,
+    PRIMARY KEY (namespace, symbol)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS series_fetched ON series (namespace, fetched_at);
+"""
+
+COLUMNS = ["namespace", "symbol", "first_day", "last_day", "rows", "tail_days",
+           "covered_from", "fetched_through", "fetched_at", "hash", "updated_at"]
+
+
+def content_hash(s: PriceSeries) -> str:
+    """Empreinte (blake2b 128 bits) des dates + valeurs."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(s.days).tobytes())
+    h.update(np.ascontiguousarray(s.values).tobytes())
+    return h.hexdigest()
+
+
+class SeriesCatalog:
+    """Index SQLite {(namespace, symbole) -> méta} ; une connexion par thread."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as c:
+            c.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            # plusieurs process (étapes de build_all) : WAL + attente sur verrou
+            c = sqlite3.connect(self.path, timeout=30.0)
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            c.row_factory = sqlite3.Row
+            self._local.conn = c
+        return c
+
+    # ---------- écriture ----------
+    def record(self, namespace: str, symbol: str, s: PriceSeries, meta: dict | None = None) -> None:
+        """Met à jour l'entrée de `symbol` après une écriture du store."""
+        meta = meta or {}
+        n = len(s)
+        row = (
+            namespace, symbol,
+            int(s.days[0]) if n else None, int(s.days[-1]) if n else None, n,
+            json.dumps([int(d) for d in s.days[-TAIL_DAYS:]]),
+            meta.get("covered_from"), meta.get("fetched_through"), meta.get("fetched_at"),
+            content_hash(s), time.time(),
+        )
+        with self._conn() as c:
+            c.execute(f"INSERT OR REPLACE INTO series ({', '.join(COLUMNS)}) "
+                      f"VALUES ({', '.join('?' * len(COLUMNS))})", row)
+
+    def forget(self, namespace: str, symbol: str) -> None:
+        with self._conn() as c:
+            c.execute("DELETE FROM series WHERE namespace = ? AND symbol = ?", (namespace, symbol))
+
+    def rebuild(self, store) -> int:
+        """Ré-indexe tous les symboles d'un store depuis ses fichiers ; renvoie leur nombre."""
+        symbols = store.symbols()
+        with self._conn() as c:
+            c.execute("DELETE FROM series WHERE namespace = ?", (store.namespace,))
+        for sym in symbols:
+            self.record(store.namespace, sym, store.load(sym), store.meta(sym))
+        return len(symbols)
+
+    # ---------- lecture ----------
+    def get(self, namespace: str, symbol: str) -> dict | None:
+        """Entrée de `symbol` (None si inconnu) ; `tail_days` décodé en liste."""
+        r = self._conn().execute(
+            "SELECT * FROM series WHERE namespace = ? AND symbol = ?", (namespace, symbol)
+        ).fetchone()
+        if r is None:
+            return None
+        d = dict(r)
+        d["tail_days"] = json.loads(d["tail_days"])
+        return d
+
+    def hashes(self, namespace: str, symbols: list[str]) -> dict[str, str]:
+        """{symbole -> empreinte} en une requête (symboles inconnus absents)."""
+        out = {}
+        for i in range(0, len(symbols), 500):   # limite de paramètres SQLite
+            chunk = symbols[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT symbol, hash FROM series WHERE namespace = ? AND symbol IN ({', '.join('?' * len(chunk))})",
+                (namespace, *chunk),
+            ).fetchall()
+            out.update((r[0], r[1]) for r in rows)
+        return out
+
+    def entries(self, namespace: str | None = None) -> pd.DataFrame:
+        """Catalogue (un symbole par ligne), dates en clair."""
+        sql, args = "SELECT * FROM series", ()
+        if namespace is not None:
+            sql, args = sql + " WHERE namespace = ?", (namespace,)
+        df = pd.read_sql_query(sql + " ORDER BY namespace, symbol", self._conn(), params=args)
+        for col in ("first_day", "last_day"):
+            df[col.replace("_day", "_date")] = pd.to_datetime(df[col], unit="D")
+        df["fetched_at"] = pd.to_datetime(df["fetched_at"], unit="s")
+        return df.drop(columns=["first_day", "last_day", "tail_days"])
+
+    def stale(self, namespace: str, older_than: float) -> list[str]:
+        """Symboles dont le dernier fetch date de plus de `older_than` secondes."""
+        cutoff = time.time() - float(older_than)
+        rows = self._conn().execute(
+            "SELECT symbol FROM series WHERE namespace = ? AND (fetched_at IS NULL OR fetched_at < ?)"
+            " ORDER BY symbol", (namespace, cutoff),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+
+_CATALOG: SeriesCatalog | None = None
+_CATALOG_LOCK = threading.Lock()
+
+def get_catalog() -> SeriesCatalog:
+    """Catalogue du process (`cache_dir/catalog.sqlite`)."""
+    global _CATALOG
+    with _CATALOG_LOCK:
+        if _CATALOG is None:
+            _CATALOG = SeriesCatalog(Path(load_config()["cache_dir"]) / "catalog.sqlite")
+        return _CATALOG
@@ -0,0 +1,148 @@
+"""
+Codec binaire des séries du store (dates + float64).
+
+Un bloc encode une série entière, décodée d'un coup en tableaux numpy :
+- dates  : delta-of-delta (1er jour, 1er écart, puis variations d'écart :
+           quasi toutes nulles en jours ouvrés), entiers au plus petit type ;
+- valeurs : si toutes tiennent sur `k` décimales (taux, spreads FRED), deltas
+           entiers de `v * 10^k` ; sinon XOR des motifs binaires successifs
+           (les octets de poids fort sont presque toujours nuls).
+Les flux sont regroupés octet par octet (byte shuffle) puis compressés
+(zlib). Tout est vectorisé : encodage et décodage sans boucle par point.
+
+Format : MAGIC, en-tête fixe (`HEADER`), flux dates, flux valeurs.
+"""
+from __future__ import annotations
+import struct, zlib
+import numpy as np
+
+MAGIC = b"MDTS"
+VERSION = 1
+# n, 1er jour, 1er écart, type dates, mode valeurs, décimales, type valeurs, 1ère valeur (bits), tailles des flux
+HEADER = struct.Struct("<BqqqBBBBQII")
+HEAD_SIZE = len(MAGIC) + HEADER.size
+
+MODE_XOR, MODE_DEC = 0, 1
+MAX_DECIMALS = 6
+LEVEL = 6
+
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _narrow(x: np.ndarray) -> tuple[int, np.ndarray]:
+    """Plus petit type entier signé qui contient `x` : (code, tableau converti)."""
+    lo, hi = (int(x.min()), int(x.max())) if len(x) else (0, 0)
+    for code, t in enumerate(_INT_TYPES):
+        info = np.iinfo(t)
+        if info.min <= lo and hi <= info.max:
+            return code, x.astype(t)
+    raise OverflowError("entiers hors int64")
+
+
+def _pack(a: np.ndarray) -> bytes:
+    """Byte shuffle (tous les octets de rang 0, puis de rang 1, ...) + zlib."""
+    a = np.ascontiguousarray(a)
+    b = a.view(np.uint8).reshape(-1, a.dtype.itemsize).T
+    return zlib.compress(np.ascontiguousarray(b).tobytes(), LEVEL)
+
+
+def _unpack(buf: bytes, dtype, n: int) -> np.ndarray:
+    dtype = np.dtype(dtype)
+    try:
+        raw = zlib.decompress(buf)
+    except zlib.error as e:   # bloc tronqué ou abîmé
+        raise ValueError(f"flux de série illisible : {e}") from None
+    b = np.frombuffer(raw, dtype=np.uint8).reshape(dtype.itemsize, n)
+    return np.ascontiguousarray(b.T).view(dtype).reshape(n)
+
+
+def _decimals(values: np.ndarray) -> int | None:
+    """Plus petit k <= MAX_DECIMALS tel que round(v * 10^k) / 10^k == v pour tout v."""
+    if not len(values) or not np.isfinite(values).all():
+        return None
+    if np.signbit(values[values == 0]).any():
+        return None   # -0.0 : les entiers le rendraient en 0.0 (égaux, pas identiques bit à bit)
+    for k in range(MAX_DECIMALS + 1):
+        scaled = values * 10.0 ** k
+        if np.abs(scaled).max() >= 2.0 ** 52:
+            return None
+        ints = np.round(scaled)
+        if np.array_equal(ints / 10.0 ** k, values):
+            return k
+    return None
+
+
+def encode(days: np.ndarray, values: np.ndarray) -> bytes:
+    """(jours epoch int64 triés, float64) -> bloc compressé."""
+    days = np.asarray(days, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    n = len(days)
+    first_day = int(days[0]) if n else 0
+    first_delta = int(days[1] - days[0]) if n > 1 else 0
+    dd = np.diff(days, n=2) if n > 2 else np.empty(0, dtype=np.int64)
+    dcode, dd = _narrow(dd)
+
+    k = _decimals(values)
+    if k is not None:
+        ints = np.round(values * 10.0 ** k).astype(np.int64)
+        first_bits = int(ints[0]) & 0xFFFFFFFFFFFFFFFF if n else 0
+        vcode, deltas = _narrow(np.diff(ints))
+        vstream, mode = _pack(deltas), MODE_DEC
+    else:
+        bits = values.view(np.uint64)
+        first_bits = int(bits[0]) if n else 0
+        vcode, vstream, mode, k = 0, _pack(bits[1:] ^ bits[:-1]), MODE_XOR, 0
+
+    dstream = _pack(dd)
+    head = HEADER.pack(VERSION, n, first_day, first_delta, dcode, mode, k, vcode,
+                       first_bits, len(dstream), len(vstream))
+    return MAGIC + head + dstream + vstream
+
+
+def peek(head: bytes) -> tuple[int, int]:
+    """
+    (nombre de points, taille totale du bloc en octets) d'après les
+    `HEAD_SIZE` premiers octets, sans décompresser les flux.
+    """
+    if len(head) < HEAD_SIZE or head[:len(MAGIC)] != MAGIC:
+        raise ValueError("bloc de série invalide")
+    version, n, *_, dlen, vlen = HEADER.unpack_from(head, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"version de codec inconnue : {version}")
+    return n, HEAD_SIZE + dlen + vlen
+
+
+def decode(buf: bytes) -> tuple[np.ndarray, np.ndarray]:
+    """Bloc -> (jours int64, valeurs float64)."""
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError("bloc de série invalide")
+    (version, n, first_day, first_delta, dcode, mode, k, vcode,
+     first_bits, dlen, vlen) = HEADER.unpack_from(buf, len(MAGIC))
+    if version != VERSION:
+        raise ValueError(f"version de codec inconnue : {version}")
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    off = len(MAGIC) + HEADER.size
+    dd = _unpack(buf[off:off + dlen], _INT_TYPES[dcode], max(n - 2, 0)).astype(np.int64)
+    vbuf = buf[off + dlen:off + dlen + vlen]
+
+    deltas = np.empty(n - 1, dtype=np.int64)
+    if n > 1:
+        deltas[0] = first_delta
+        deltas[1:] = first_delta + np.cumsum(dd)
+    days = np.empty(n, dtype=np.int64)
+    days[0] = first_day
+    np.cumsum(deltas, out=days[1:])
+    days[1:] += first_day
+
+    if mode == MODE_DEC:
+        ints = np.empty(n, dtype=np.int64)
+        ints[0] = np.uint64(first_bits).astype(np.int64)
+        ints[1:] = _unpack(vbuf, _INT_TYPES[vcode], n - 1)
+        values = np.cumsum(ints).astype(np.float64) / 10.0 ** k
+    else:
+        bits = np.empty(n, dtype=np.uint64)
+        bits[0] = first_bits
+        bits[1:] = _unpack(vbuf, np.uint64, n - 1)
+        values = np.bitwise_xor.accumulate(bits).view(np.float64)
+    return days, values
@@ -6,6 +6,7 @@ _DEFAULTS = {
     "cache_dir": "data",
     "output_dir": "output",
     "te_api_key": os.getenv("TE_API_KEY", ""),  # optionnel, peut rester vide
+    "store_fresh_minutes": 15,  # store local : délai avant de re-demander la queue
 }
 
 def load_config(path: str | Path = "config.yaml") -> dict:
@@ -0,0 +1,144 @@
+"""
+Ajustement Nelson–Siegel de courbes de taux, toutes dates d'un coup.
+
+    y(t) = b0 + b1 * (1 - e^(-t/tau)) / (t/tau) + b2 * ((1 - e^(-t/tau)) / (t/tau) - e^(-t/tau))
+
+À `tau` fixé le modèle est linéaire : pour chaque `tau` d'une grille, les
+b sont obtenus par moindres carrés en un produit matriciel pour toutes
+les dates qui ont le même jeu de maturités renseignées ; on garde ensuite,
+date par date, le `tau` de plus faible erreur. Aucun optimiseur par date.
+
+Les paramètres sont mis en cache (`cache_dir/curves/<clé>.npz`) : au
+refresh, seules les nouvelles dates (et la dernière déjà ajustée, qui a
+pu être révisée) sont ré-ajustées.
+"""
+from __future__ import annotations
+from pathlib import Path
+import json, os, threading
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+from .utils import ensure_dir
+
+# maturités (années) des colonnes de rates_fred.cols
+US_TENORS: dict[str, float] = {
+    "US_1M": 1 / 12, "US_3M": 0.25, "US_6M": 0.5, "US_1Y": 1.0, "US_2Y": 2.0,
+    "US_3Y": 3.0, "US_5Y": 5.0, "US_7Y": 7.0, "US_10Y": 10.0, "US_20Y": 20.0, "US_30Y": 30.0,
+}
+
+TAU_GRID = np.geomspace(0.25, 10.0, 40)
+PARAM_COLUMNS = ["b0", "b1", "b2", "tau", "rmse"]
+MIN_TENORS = 4
+
+
+def ns_loadings(t: np.ndarray, tau: float | np.ndarray) -> np.ndarray:
+    """Matrice (..., M, 3) des facteurs [1, pente, courbure] aux maturités `t`."""
+    x = np.asarray(t, dtype=float) / np.asarray(tau, dtype=float)[..., None]
+    e = np.exp(-x)
+    slope = (1.0 - e) / x
+    return np.stack([np.ones_like(x), slope, slope - e], axis=-1)
+
+
+def fit_ns(panel: pd.DataFrame, tenors: dict[str, float] | None = None,
+           tau_grid: np.ndarray = TAU_GRID) -> pd.DataFrame:
+    """
+    Paramètres Nelson–Siegel (b0, b1, b2, tau, rmse) pour chaque date de
+    `panel` (date x colonne de maturité). Dates avec moins de `MIN_TENORS`
+    maturités renseignées -> NaN.
+    """
+    tenors = tenors or US_TENORS
+    cols = [c for c in tenors if c in panel.columns]
+    Y = panel[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    t = np.array([tenors[c] for c in cols])
+    out = np.full((len(Y), len(PARAM_COLUMNS)), np.nan)
+    if not len(Y) or len(cols) < MIN_TENORS:
+        return pd.DataFrame(out, index=panel.index, columns=PARAM_COLUMNS)
+
+    X_all = ns_loadings(t, tau_grid)                      # (G, M, 3)
+    mask = ~np.isnan(Y)
+    # un groupe par motif de maturités renseignées
+    patterns, inverse = np.unique(mask, axis=0, return_inverse=True)
+    for k, pat in enumerate(patterns):
+        if pat.sum() < MIN_TENORS:
+            continue
+        rows = np.flatnonzero(inverse.ravel() == k)
+        y = Y[np.ix_(rows, pat)]                           # (R, m)
+        X = X_all[:, pat, :]                               # (G, m, 3)
+        B = np.einsum("gkm,rm->grk", np.linalg.pinv(X), y)  # (G, R, 3)
+        resid = y[None, :, :] - np.einsum("gmk,grk->grm", X, B)
+        sse = np.einsum("grm,grm->gr", resid, resid)
+        best = np.argmin(sse, axis=0)                      # (R,)
+        r = np.arange(len(rows))
+        out[rows, 0:3] = B[best, r]
+        out[rows, 3] = tau_grid[best]
+        out[rows, 4] = np.sqrt(sse[best, r] / pat.sum())
+    return pd.DataFrame(out, index=panel.index, columns=PARAM_COLUMNS)
+
+
+def ns_yields(params: pd.DataFrame, tenors: dict[str, float] | None = None) -> pd.DataFrame:
+    """Taux ajustés (date x maturité) à partir des paramètres, toutes dates d'un coup."""
+    tenors = tenors or US_TENORS
+    t = np.array(list(tenors.values()), dtype=float)
+    P = params[["b0", "b1", "b2"]].to_numpy(dtype=np.float64)
+    X = ns_loadings(t, params["tau"].to_numpy(dtype=np.float64))  # (T, M, 3)
+    return pd.DataFrame(np.einsum("tmk,tk->tm", X, P), index=params.index, columns=list(tenors))
+
+
+# ---------- cache des paramètres ----------
+def _cache_path(key: str) -> Path:
+    return ensure_dir(Path(load_config()["cache_dir"]) / "curves") / f"{key}.npz"
+
+
+def _load_params(path: Path, sig: dict) -> pd.DataFrame | None:
+    """Paramètres en cache, None si absents, illisibles ou d'une autre signature."""
+    try:
+        with np.load(path) as z:
+            if json.loads(str(z["sig"])) != sig:
+                return None
+            index = pd.DatetimeIndex(z["dates"], name="date")
+            return pd.DataFrame(z["params"], index=index, columns=[str(c) for c in z["columns"]])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_params(path: Path, params: pd.DataFrame, sig: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("wb") as f:
+        np.savez(f, sig=np.array(json.dumps(sig)), dates=params.index.values.astype("datetime64[ns]"),
+                 columns=np.array(list(params.columns), dtype=str),
+                 params=params.to_numpy(dtype=np.float64))
+    os.replace(tmp, path)
+    for old in (path.with_suffix(".csv"), path.with_suffix(".json")):   # ancien cache CSV + JSON
+        old.unlink(missing_ok=True)
+
+
+def _signature(tenors: dict[str, float], tau_grid: np.ndarray) -> dict:
+    return {"tenors": tenors, "tau_grid": [round(float(x), 10) for x in tau_grid]}
+
+
+def fit_ns_cached(panel: pd.DataFrame, key: str = "us_ns", tenors: dict[str, float] | None = None,
+                  tau_grid: np.ndarray = TAU_GRID) -> pd.DataFrame:
+    """
+    Comme `fit_ns`, avec cache disque : seules les dates postérieures à la
+    dernière date ajustée (incluse) sont ré-ajustées. Changement de
+    maturités ou de grille -> ré-ajustement complet.
+    """
+    tenors = tenors or US_TENORS
+    path = _cache_path(key)
+    sig = _signature(tenors, tau_grid)
+    cached = _load_params(path, sig)
+
+    panel = panel.sort_index()
+    if cached is not None and len(cached):
+        last = cached.index[-1]
+        keep = cached[cached.index < last]
+        todo = panel.index[(panel.index >= last) | ~panel.index.isin(keep.index)]
+        params = pd.concat([keep, fit_ns(panel.loc[todo], tenors, tau_grid)]).sort_index()
+        params = params[~params.index.duplicated(keep="last")]
+    else:
+        params = fit_ns(panel, tenors, tau_grid)
+    params.index.name = "date"
+
+    _save_params(path, params, sig)
+    return params.reindex(panel.index)
@@ -0,0 +1,180 @@
+"""
+Séries dérivées (spreads, pentes, ratios) déclarées une fois.
+
+Chaque série dérivée est une expression sur des colonnes (syntaxe
+`DataFrame.eval`), déclarée dans config.yaml :
+
+    derived:
+      US_2s10s: "(US_10Y - US_2Y) * 100"
+      FR_DE_10Y: "(OAT_10Y - Bund_10Y) * 100"
+      US_HY_IG: US_HY_OAS - US_IG_OAS
+
+Une expression peut utiliser une série dérivée déclarée avant elle.
+Avec une clé de cache, les résultats sont matérialisés dans le store
+(`cache_dir/store/derived`) avec une empreinte par mois de chacune de
+leurs entrées : au run suivant, seules les lignes depuis le premier mois
+où une entrée a changé (valeur révisée, publication tardive) ou depuis la
+dernière date calculée sont réévaluées (expressions point à point).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import ast, hashlib, threading, time
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+from .series import PriceSeries
+from .store import get_store
+
+
+@dataclass(frozen=True)
+class DerivedSeries:
+    name: str
+    expr: str
+    inputs: tuple[str, ...]
+
+
+def expr_inputs(expr: str) -> tuple[str, ...]:
+    """Noms de colonnes utilisés par une expression (ordre d'apparition)."""
+    try:
+        tree = ast.parse(expr, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Expression dérivée invalide : {expr!r} ({e.msg})") from None
+    names = [n.id for n in ast.walk(tree) if isinstance(n, ast.Name)]
+    return tuple(dict.fromkeys(names))
+
+
+def month_fingerprints(s: pd.Series) -> dict[str, str]:
+    """{"AAAA-MM" -> empreinte des (dates, valeurs) non NaN du mois} d'une colonne à index daté trié."""
+    s = s.dropna()
+    days = s.index.values.astype("datetime64[D]")
+    values = s.to_numpy(dtype=np.float64)
+    months = days.astype("datetime64[M]")
+    cuts = np.flatnonzero(np.r_[True, months[1:] != months[:-1], True])
+    out = {}
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        h = hashlib.blake2b(days[a:b].astype(np.int64).tobytes(), digest_size=8)
+        h.update(values[a:b].tobytes())
+        out[str(months[a])] = h.hexdigest()
+    return out
+
+
+def first_change(old: dict[str, str], new: dict[str, str]) -> pd.Timestamp | None:
+    """Début du premier mois dont l'empreinte diffère (None si aucun)."""
+    changed = [m for m in old.keys() | new.keys() if old.get(m) != new.get(m)]
+    return pd.Timestamp(min(changed)) if changed else None
+
+
+class DerivedRegistry:
+    """Registre ordonné {nom -> expression}, évalué sur un DataFrame (date x colonne)."""
+
+    def __init__(self, namespace: str = "derived"):
+        self.namespace = namespace
+        self._specs: dict[str, DerivedSeries] = {}
+
+    def define(self, name: str, expr: str) -> DerivedSeries:
+        spec = DerivedSeries(name, expr, expr_inputs(expr))
+        self._specs[name] = spec
+        return spec
+
+    def names(self) -> list[str]:
+        return list(self._specs)
+
+    def __getitem__(self, name: str) -> DerivedSeries:
+        return self._specs[name]
+
+    def available(self, columns) -> list[str]:
+        """Séries dérivées calculables à partir de `columns`."""
+        have = set(columns)
+        out = []
+        for name, spec in self._specs.items():
+            if set(spec.inputs) <= have:
+                out.append(name)
+                have.add(name)
+        return out
+
+    # ---------- évaluation ----------
+    def _eval(self, df: pd.DataFrame, names: list[str]) -> pd.DataFrame:
+        work = df.copy()
+        for name in names:
+            work[name] = work.eval(self._specs[name].expr).astype(float)
+        return work[names]
+
+    def evaluate(self, df: pd.DataFrame, names: list[str] | None = None,
+                 cache_key: str | None = None) -> pd.DataFrame:
+        """
+        Séries dérivées `names` (défaut : toutes celles calculables) sur
+        l'index de `df`. Avec `cache_key`, les résultats sont lus dans le
+        store et seule la queue (>= dernière date calculée) est réévaluée.
+        """
+        names = self.available(df.columns) if names is None else list(names)
+        missing = [n for n in names if n not in self._specs]
+        if missing:
+            raise KeyError(f"Séries dérivées inconnues : {missing}")
+        # dépendances dérivées : évaluées aussi (dans l'ordre de déclaration)
+        need = set(names)
+        for name in reversed(list(self._specs)):
+            if name in need:
+                need.update(i for i in self._specs[name].inputs if i in self._specs)
+        order = [n for n in self._specs if n in need and n not in df.columns]
+        if cache_key is None or df.empty:
+            out = self._eval(df, order) if order else pd.DataFrame(index=df.index)
+        else:
+            out = pd.DataFrame(index=df.index)
+            for name in order:
+                out[name] = self._cached(df.join(out), name, f"{cache_key}.{name}")
+        return pd.DataFrame({n: out[n] if n in out else df[n] for n in names}, index=df.index)
+
+    def _cached(self, df: pd.DataFrame, name: str, sym: str) -> pd.Series:
+        """
+        Évalue `name` en ne recalculant que depuis la dernière date calculée
+        ou le premier mois où une entrée a changé, si celui-ci est antérieur.
+        """
+        store = get_store(self.namespace)
+        spec = self._specs[name]
+        first, last = df.index[0], df.index[-1]
+        meta = store.meta(sym)
+        prints = {i: month_fingerprints(df[i]) for i in spec.inputs}
+        old_prints = meta.get("inputs") or {}
+        ok = (meta.get("expr") == spec.expr and meta.get("through") and meta.get("covered_from")
+              and pd.Timestamp(meta["covered_from"]) <= first and old_prints.keys() == prints.keys())
+        since = pd.Timestamp(meta["through"]) if ok else first
+        if ok:
+            # entrée révisée ou complétée en arrière (séries mensuelles publiées en retard)
+            m0 = str(first.to_period("M"))   # mois antérieurs à la fenêtre : non comparés
+            for i, fp in prints.items():
+                changed = first_change({m: h for m, h in old_prints[i].items() if m >= m0}, fp)
+                if changed is not None:
+                    since = max(first, min(since, changed))
+        # la dernière ligne déjà calculée est réévaluée (elle a pu bouger)
+        new = PriceSeries.from_pandas(self._eval(df.loc[since:], [name])[name], sym)
+        if ok:
+            new = store.load(sym).slice(first, since - pd.Timedelta(days=1)).merge(new)
+        store.write(sym, new, expr=spec.expr, inputs=prints,
+                    covered_from=meta["covered_from"] if ok else str(first.date()),
+                    through=str(last.date()), fetched_at=time.time())
+        return new.to_pandas().reindex(df.index)
+
+
+# ---------- registre par défaut (section `derived` de config.yaml) ----------
+_REGISTRY: DerivedRegistry | None = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_registry() -> DerivedRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            reg = DerivedRegistry()
+            for name, expr in (load_config().get("derived") or {}).items():
+                reg.define(str(name), str(expr))
+            _REGISTRY = reg
+        return _REGISTRY
+
+
+def add_derived(df: pd.DataFrame, cache_key: str | None = None) -> pd.DataFrame:
+    """`df` + toutes les séries dérivées calculables (registre par défaut)."""
+    reg = get_registry()
+    names = [n for n in reg.available(df.columns) if n not in df.columns]
+    if not names:
+        return df
+    return df.join(reg.evaluate(df, names, cache_key=cache_key))
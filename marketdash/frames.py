@@ -0,0 +1,337 @@
+"""
+Passage des tableaux entre collecte et rendu : format colonnes binaire.
+
+Un fichier `<nom>.cols` contient un en-tête JSON (schéma : nom, dtype,
+offset de chaque colonne, colonne d'index, empreinte du contenu) puis les colonnes les unes
+après les autres, alignées sur 64 octets, en binaire natif
+(datetime64, float64, int64, bool, chaînes `<U`). La lecture ouvre
+le fichier en mémoire mappée et ne touche que les colonnes demandées
+(et, pour un index daté trié, que les lignes de [start, end]) : pas de
+parsing texte de dates ni de flottants.
+
+L'export CSV reste disponible (section `frames` de config.yaml) :
+
+    frames:
+      csv_export: false     # true : écrit aussi <nom>.csv à côté
+      shared_memory: false  # build_all : passage en mémoire partagée
+
+En mémoire partagée (`build_all --shm`), les mêmes octets sont publiés
+dans un segment POSIX par tableau : les étapes suivantes les lisent sans
+copie ni accès disque, les fichiers sont écrits en fin de build.
+"""
+from __future__ import annotations
+from pathlib import Path
+from multiprocessing import resource_tracker, shared_memory
+import hashlib, json, os, secrets, struct, tempfile, threading
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+
+EXT = ".cols"
+MAGIC = b"MDCOLS1\n"
+ALIGN = 64
+
+
+def frame_path(path: str | Path) -> Path:
+    """`data/rates_fred` (ou `.csv` / `.cols`) -> `data/rates_fred.cols`."""
+    p = Path(path)
+    if p.name.endswith((EXT, ".csv")):
+        p = p.with_name(p.name.rsplit(".", 1)[0])
+    # pas de with_suffix : 'rates.v2' perdrait son '.v2'
+    return p.with_name(p.name + EXT)
+
+
+def frame_exists(path: str | Path) -> bool:
+    """Fichier `.cols` présent, ou tableau publié dans la session mémoire partagée."""
+    p = frame_path(path)
+    return p.exists() or (shm_session() is not None and _attach_shared(p) is not None)
+
+
+def csv_export() -> bool:
+    return bool((load_config().get("frames") or {}).get("csv_export", False))
+
+
+def shared_memory_enabled() -> bool:
+    return bool((load_config().get("frames") or {}).get("shared_memory", False))
+
+
+# ---------- écriture ----------
+def _column_array(s: pd.Series) -> np.ndarray:
+    """Colonne pandas -> tableau numpy à dtype fixe (stockable tel quel)."""
+    if isinstance(s.dtype, pd.DatetimeTZDtype):
+        s = s.dt.tz_convert(None)
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s.to_numpy()  # datetime64 dans l'unité de la colonne (ns, us...)
+    if pd.api.types.is_bool_dtype(s.dtype) and not s.hasnans:
+        return s.to_numpy(dtype=bool)
+    if pd.api.types.is_integer_dtype(s.dtype) and not s.hasnans:
+        return s.to_numpy(dtype=np.int64)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.to_numpy(dtype=np.float64, na_value=np.nan)
+    # texte : chaînes de largeur fixe, valeur manquante -> ""
+    return np.asarray(s.astype(object).where(s.notna(), "").astype(str).to_numpy(), dtype=str)
+
+
+def _layout(df: pd.DataFrame, index: bool) -> tuple[bytes, list[np.ndarray], int]:
+    """(en-tête complet, colonnes, taille totale) : même octets en fichier ou en mémoire partagée."""
+    cols: list[tuple[str, np.ndarray]] = []
+    index_name = None
+    if index:
+        index_name = str(df.index.name or ("date" if isinstance(df.index, pd.DatetimeIndex) else "index"))
+        cols.append((index_name, _column_array(df.index.to_series(index=range(len(df))))))
+    for c in df.columns:
+        cols.append((str(c), _column_array(df[c].reset_index(drop=True))))
+
+    schema, offset = [], 0
+    # empreinte du contenu (schéma + octets) : clé des vues mémoïsées (cf. marketdash.query)
+    h = hashlib.blake2b(digest_size=16)
+    for name, arr in cols:
+        schema.append({"name": name, "dtype": arr.dtype.str, "offset": offset})
+        offset += -(-arr.nbytes // ALIGN) * ALIGN
+        h.update(f"{name}\0{arr.dtype.str}\0{len(arr)}\0".encode("utf-8"))
+        if arr.nbytes:
+            h.update(np.ascontiguousarray(arr).view(np.uint8))
+    header = json.dumps({"rows": len(df), "index": index_name, "columns": schema,
+                         "hash": h.hexdigest()}, ensure_ascii=False).encode("utf-8")
+    head_len = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+    head = MAGIC + struct.pack("<Q", len(header)) + header
+    return head + b"\0" * (head_len - len(head)), [a for _, a in cols], head_len + offset
+
+
+def _write_file(out: Path, head: bytes, arrays: list[np.ndarray]) -> None:
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(head)
+        for arr in arrays:
+            f.write(np.ascontiguousarray(arr).tobytes())
+            f.write(b"\0" * (-arr.nbytes % ALIGN))
+    os.replace(tmp, out)
+
+
+def write_frame(df: pd.DataFrame, path: str | Path, index: bool = True,
+                csv: bool | None = None, **csv_kwargs) -> Path:
+    """
+    Écrit `df` en `<path>.cols` (écriture atomique) et renvoie le chemin.
+    `index=True` stocke l'index (nommé `date` par défaut s'il est daté).
+    `csv` (défaut : frames.csv_export) écrit aussi `<path>.csv`
+    (`csv_kwargs` passés à `to_csv`).
+    Dans une session mémoire partagée (cf. `shm_session`), le tableau va
+    dans un segment partagé ; le fichier est écrit en fin de build (`flush_shared`).
+    """
+    out = frame_path(path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    head, arrays, size = _layout(df, index)
+    if shm_session():
+        _write_shared(out, head, arrays, size)
+    else:
+        _write_file(out, head, arrays)
+
+    if csv_export() if csv is None else csv:
+        df.to_csv(out.with_name(out.name[:-len(EXT)] + ".csv"), index=index, **csv_kwargs)
+    return out
+
+
+# ---------- lecture ----------
+def _parse_header(buf) -> dict:
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError("format colonnes inconnu")
+    (n,) = struct.unpack("<Q", bytes(buf[len(MAGIC):len(MAGIC) + 8]))
+    schema = json.loads(bytes(buf[len(MAGIC) + 8:len(MAGIC) + 8 + n]).decode("utf-8"))
+    schema["data_offset"] = -(-(len(MAGIC) + 8 + n) // ALIGN) * ALIGN
+    return schema
+
+
+def read_schema(path: str | Path) -> dict:
+    """
+    En-tête d'un tableau (rows, index, columns[name, dtype, offset], hash),
+    lu dans le segment partagé de la session s'il existe, sinon dans le fichier.
+    """
+    p = frame_path(path)
+    buf = _attach_shared(p) if shm_session() else None
+    if buf is not None:
+        return _parse_header(buf)
+    with p.open("rb") as f:
+        head = f.read(len(MAGIC) + 8)
+        try:
+            (n,) = struct.unpack("<Q", head[len(MAGIC):])
+            return _parse_header(head + f.read(n))
+        except (ValueError, struct.error):
+            raise ValueError(f"{p} : format colonnes inconnu") from None
+
+
+def read_frame(path: str | Path, columns: list[str] | None = None,
+               start=None, end=None, copy: bool | None = None) -> pd.DataFrame:
+    """
+    Relit `<path>.cols` (mémoire mappée). `columns` : projection (seules
+    ces colonnes sont lues) ; `start` / `end` : bornes incluses sur un
+    index daté trié (recherche dichotomique, sans lire les autres lignes).
+    Dans une session mémoire partagée, le segment publié est lu sans copie
+    (colonnes en lecture seule) ; `copy=True` force une copie.
+    """
+    p = frame_path(path)
+    buf = _attach_shared(p) if shm_session() else None
+    if buf is not None:
+        schema = _parse_header(buf)
+        copy = False if copy is None else copy
+    else:
+        schema = read_schema(p)
+        copy = True if copy is None else copy
+    rows, base = int(schema["rows"]), schema["data_offset"]
+    spec = {c["name"]: c for c in schema["columns"]}
+    index_name = schema.get("index")
+
+    def column(name: str) -> np.ndarray:
+        c = spec[name]
+        dt = np.dtype(c["dtype"])
+        if rows == 0 or dt.itemsize == 0:
+            return np.empty(0, dtype=dt)
+        if buf is not None:
+            a = np.frombuffer(buf, dtype=dt, count=rows, offset=base + c["offset"])
+            a.flags.writeable = False
+            return a
+        return np.memmap(p, dtype=dt, mode="r", offset=base + c["offset"], shape=(rows,))
+
+    names = [c for c in spec if c != index_name] if columns is None else list(columns)
+    missing = [c for c in names if c not in spec]
+    if missing:
+        raise KeyError(f"{p.name} : colonnes absentes {missing}")
+
+    i0, i1 = 0, rows
+    idx = column(index_name) if index_name else None
+    if idx is not None and (start is not None or end is not None):
+        if start is not None:
+            i0 = int(np.searchsorted(idx, pd.Timestamp(start).to_datetime64(), side="left"))
+        if end is not None:
+            i1 = int(np.searchsorted(idx, pd.Timestamp(end).to_datetime64(), side="right"))
+
+    # fichier : copie des lignes retenues, le DataFrame rendu ne dépend pas du fichier
+    take = (lambda a: np.array(a[i0:i1])) if copy else (lambda a: a[i0:i1])
+    data = {c: take(column(c)) for c in names}
+    index = None
+    if idx is not None:
+        index = pd.Index(take(idx), name=index_name, copy=False)
+    return pd.DataFrame(data, index=index, columns=names, copy=False)
+
+
+# ---------- mémoire partagée (build_all --shm) ----------
+# Le producteur publie le tableau dans un segment nommé d'après la session
+# et le chemin ; les étapes suivantes (autres process) le mappent en lecture
+# seule. Le process qui lance la session (build_all) écrit les fichiers puis
+# libère les segments à la fin (`flush_shared`).
+SHM_ENV = "MARKETDASH_SHM"
+
+_ATTACHED: dict[str, shared_memory.SharedMemory] = {}
+_SHM_LOCK = threading.Lock()
+
+
+def shm_session() -> str | None:
+    """Identifiant de la session mémoire partagée du process (variable d'environnement)."""
+    return os.environ.get(SHM_ENV) or None
+
+
+def start_shared_session() -> str:
+    """Ouvre une session (héritée par les sous-process) et renvoie son identifiant."""
+    session = f"{os.getpid() & 0xFFFFFF:06x}{secrets.token_hex(2)}"
+    os.environ[SHM_ENV] = session
+    return session
+
+
+def _segment_name(p: Path, session: str) -> str:
+    # noms POSIX courts (macOS : 31 caractères) : empreinte du chemin absolu
+    h = hashlib.blake2b(str(p.resolve()).encode("utf-8"), digest_size=6).hexdigest()
+    return f"md{session}_{h}"
+
+
+def _manifest(session: str) -> Path:
+    return Path(tempfile.gettempdir()) / f"marketdash-shm-{session}.txt"
+
+
+def _untrack(shm: shared_memory.SharedMemory) -> None:
+    # le resource_tracker de CPython détruirait le segment à la sortie du
+    # process qui l'a créé / ouvert : la session en garde la propriété
+    # (`unlink` le retire lui-même du tracker : pas d'appel avant unlink)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _write_shared(out: Path, head: bytes, arrays: list[np.ndarray], size: int) -> None:
+    session = shm_session()
+    name = _segment_name(out, session)
+    with _SHM_LOCK:
+        # republication : l'ancien segment est retiré (les lecteurs déjà
+        # attachés gardent son contenu), un nouveau est créé à la bonne taille
+        _ATTACHED.pop(name, None)
+        try:
+            shared_memory.SharedMemory(name=name).unlink()
+        except FileNotFoundError:
+            pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        _untrack(shm)
+        pos = len(head)
+        shm.buf[:pos] = head
+        for arr in arrays:
+            b = np.ascontiguousarray(arr).view(np.uint8).reshape(-1)
+            shm.buf[pos:pos + len(b)] = b
+            pos += -(-len(b) // ALIGN) * ALIGN
+        _ATTACHED[name] = shm
+    with _manifest(session).open("a", encoding="utf-8") as f:
+        f.write(f"{name}\t{out.resolve()}\n")
+
+
+def _attach_shared(p: Path) -> memoryview | None:
+    """Contenu du segment publié pour `p` dans la session, None s'il n'existe pas."""
+    name = _segment_name(p, shm_session())
+    with _SHM_LOCK:
+        shm = _ATTACHED.get(name)
+        if shm is None:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                return None
+            _untrack(shm)
+            _ATTACHED[name] = shm   # gardé ouvert : les tableaux rendus pointent dedans
+    return shm.buf
+
+
+def flush_shared(session: str | None = None, write_files: bool = True) -> int:
+    """
+    Fin de session : écrit chaque segment publié dans son fichier `.cols`
+    (mêmes octets), puis libère les segments. Renvoie leur nombre.
+    """
+    session = session or shm_session()
+    if not session:
+        return 0
+    manifest = _manifest(session)
+    try:
+        lines = manifest.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return 0
+    published = dict(line.split("\t", 1) for line in lines if "\t" in line)  # dernier écrit gagne
+    n = 0
+    for name, target in published.items():
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        try:
+            if write_files:
+                out = Path(target)
+                schema = _parse_header(shm.buf)
+                end = schema["data_offset"] + max(
+                    [c["offset"] + np.dtype(c["dtype"]).itemsize * int(schema["rows"]) for c in schema["columns"]],
+                    default=0)
+                end = -(-end // ALIGN) * ALIGN   # mêmes octets qu'une écriture fichier
+                tmp = out.with_name(f".{out.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(bytes(shm.buf[:end]))
+                os.replace(tmp, out)
+            n += 1
+        finally:
+            shm.close()
+            shm.unlink()
+    manifest.unlink(missing_ok=True)
+    if os.environ.get(SHM_ENV) == session:
+        del os.environ[SHM_ENV]
+    return n
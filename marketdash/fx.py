@@ -0,0 +1,137 @@
+"""
+Conversion de panels de prix dans une devise de référence.
+
+La devise de cotation est déduite du ticker (suffixe de place, `-USD`
+des cryptos, indices connus), avec des exceptions dans config.yaml :
+
+    fx:
+      base_currency: null        # ex. EUR : perfs converties dans cette devise
+      overrides:
+        IEAC.L: EUR
+        ^VIX: null               # null = pas de conversion (taux, volatilité, changes)
+
+Les changes viennent des paires Yahoo `EURxxx=X` (xxx pour 1 EUR) : un
+prix en devise c vaut, en devise B, `prix * fx[B] / fx[c]`. Le panel de
+facteurs (date x instrument) est construit en une fois et appliqué par
+broadcast : une seule multiplication pour tout le panel.
+"""
+from __future__ import annotations
+from datetime import datetime
+import re
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+
+PIVOT = "EUR"
+
+# suffixe de place Yahoo -> devise
+SUFFIX_CCY = {
+    "DE": "EUR", "F": "EUR", "PA": "EUR", "AS": "EUR", "MI": "EUR", "MC": "EUR", "BR": "EUR",
+    "LS": "EUR", "VI": "EUR", "HE": "EUR", "IR": "EUR",
+    "L": "GBP", "SW": "CHF", "ST": "SEK", "OL": "NOK", "CO": "DKK",
+    "T": "JPY", "HK": "HKD", "SS": "CNY", "SZ": "CNY", "SA": "BRL", "TO": "CAD", "AX": "AUD",
+}
+
+# indices (^...) hors USD
+INDEX_CCY = {
+    "^STOXX50E": "EUR", "^STOXX": "EUR", "^GDAXI": "EUR", "^FCHI": "EUR", "^CACSM": "EUR",
+    "^CACMS": "EUR", "^AEX": "EUR", "^IBEX": "EUR", "^FTSE": "GBP", "^SSMI": "CHF",
+    "^N225": "JPY", "^HSI": "HKD", "^BVSP": "BRL",
+}
+
+# niveaux qui ne sont pas des prix : jamais convertis
+NOT_PRICES = {"^VIX", "^VSTOXX", "^TNX", "^TYX", "^FVX", "^IRX"}
+
+
+def fx_config() -> dict:
+    return load_config().get("fx") or {}
+
+
+def currency_of(ticker: str, overrides: dict | None = None) -> str | None:
+    """Devise de cotation de `ticker` (None = pas de conversion)."""
+    if overrides is None:
+        overrides = fx_config().get("overrides") or {}
+    if ticker in overrides:
+        return overrides[ticker] or None
+    if ticker in NOT_PRICES or ticker.endswith("=X"):
+        return None
+    if ticker.endswith("=F"):
+        return "USD"
+    m = re.search(r"-([A-Z]{3})$", ticker)
+    if m:
+        return m.group(1)
+    if ticker.startswith("^"):
+        return INDEX_CCY.get(ticker, "USD")
+    if "." in ticker:
+        return SUFFIX_CCY.get(ticker.rsplit(".", 1)[1].upper(), "USD")
+    return "USD"
+
+
+def fx_ticker(ccy: str) -> str:
+    return f"{PIVOT}{ccy}=X"
+
+
+def fx_panel(currencies: list[str], start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    Changes (unités de devise pour 1 EUR) sur [start, end] -> DataFrame
+    (date x devise), EUR = 1. Passe par le store / memo Yahoo.
+    """
+    from .providers import yf_history_many
+
+    ccys = list(dict.fromkeys(c for c in currencies if c))
+    others = [c for c in ccys if c != PIVOT]
+    if others:
+        px = yf_history_many([fx_ticker(c) for c in others], start, end)
+        px.columns = others
+    else:
+        px = pd.DataFrame(index=pd.DatetimeIndex([]))
+    if PIVOT in ccys:
+        px[PIVOT] = 1.0
+    return px.reindex(columns=ccys)
+
+
+def factor_matrix(dates: np.ndarray, currencies: list[str | None], base: str,
+                  fx: pd.DataFrame) -> np.ndarray:
+    """
+    Facteurs (T x N) de conversion vers `base` aux dates `dates` : dernier
+    change connu <= date (NaN avant le 1er ou si le change manque), 1 pour
+    les colonnes sans devise.
+    """
+    dates = np.asarray(dates, dtype="datetime64[ns]")
+    fx = fx.sort_index()
+    F = fx.ffill().to_numpy(dtype=np.float64, na_value=np.nan)    # (Tfx, K)
+    pos = np.searchsorted(fx.index.values.astype("datetime64[ns]"), dates, side="right") - 1
+    rates = np.full((len(dates), F.shape[1]), np.nan)
+    ok = pos >= 0
+    rates[ok] = F[pos[ok]]
+    col = {c: i for i, c in enumerate(fx.columns)}
+    base_rate = rates[:, col[base]] if base != PIVOT else np.ones(len(dates))
+
+    idx = np.array([col.get(c, -1) if c else -1 for c in currencies], dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = base_rate[:, None] / rates[:, np.maximum(idx, 0)]
+    out[:, idx < 0] = np.nan                                   # change indisponible
+    keep = np.array([not c or c == base for c in currencies], dtype=bool)
+    out[:, keep] = 1.0
+    return out
+
+
+def translate_values(dates: np.ndarray, values: np.ndarray, currencies: list[str | None],
+                     base: str, fx: pd.DataFrame | None = None) -> np.ndarray:
+    """Valeurs (T x N) converties dans `base` (une multiplication broadcast)."""
+    need = [c for c in currencies if c and c != base]
+    if not need or not len(dates):
+        return values
+    if fx is None:
+        d = pd.DatetimeIndex(np.asarray(dates, dtype="datetime64[ns]"))
+        fx = fx_panel(need + [base], d.min().to_pydatetime() - pd.Timedelta(days=10), d.max().to_pydatetime())
+    return values * factor_matrix(dates, currencies, base, fx)
+
+
+def translate_frame(px: pd.DataFrame, base: str, currencies: dict[str, str | None] | None = None,
+                    fx: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Panel (date x ticker) converti dans `base` ; devise déduite des tickers par défaut."""
+    ccys = [currencies[c] if currencies and c in currencies else currency_of(str(c)) for c in px.columns]
+    vals = translate_values(px.index.values, px.to_numpy(dtype=np.float64, na_value=np.nan), ccys, base, fx)
+    return pd.DataFrame(vals, index=px.index, columns=px.columns)
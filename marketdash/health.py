@@ -0,0 +1,115 @@
+"""
+Cache négatif / santé des symboles.
+
+Un symbole qui revient vide (ou en erreur) est noté dans
+`cache_dir/symbol_health.json` et n'est plus demandé au réseau avant
+son prochain re-test. Le délai double à chaque échec consécutif
+(`base_hours` * 2^(n-1), plafonné à `max_days`) ; un succès l'efface.
+
+Config (config.yaml) :
+
+    health:
+      base_hours: 6
+      max_days: 7
+"""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+import json, os, threading, time
+
+from .config import load_config
+
+
+class SymbolHealth:
+    """Registre persistant {namespace:symbole -> échecs, prochain re-test}."""
+
+    def __init__(self, path: str | Path, base_delay: float = 6 * 3600.0,
+                 max_delay: float = 7 * 86400.0):
+        self.path = Path(path)
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    @classmethod
+    def from_config(cls, cfg: dict | None = None) -> "SymbolHealth":
+        cfg = cfg if cfg is not None else load_config()
+        h = cfg.get("health") or {}
+        return cls(
+            Path(cfg["cache_dir"]) / "symbol_health.json",
+            base_delay=float(h.get("base_hours", 6)) * 3600.0,
+            max_delay=float(h.get("max_days", 7)) * 86400.0,
+        )
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(self._data, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _key(namespace: str, symbol: str) -> str:
+        return f"{namespace}:{symbol}"
+
+    def should_skip(self, namespace: str, symbol: str) -> bool:
+        """True si le symbole est marqué mort et que son re-test n'est pas dû."""
+        with self._lock:
+            e = self._data.get(self._key(namespace, symbol))
+            return e is not None and time.time() < e.get("next_probe", 0)
+
+    def record_failure(self, namespace: str, symbol: str, reason: str = "empty") -> None:
+        now = time.time()
+        with self._lock:
+            e = self._data.get(self._key(namespace, symbol)) or {"failures": 0}
+            e["failures"] = int(e["failures"]) + 1
+            delay = min(self.base_delay * 2 ** (e["failures"] - 1), self.max_delay)
+            e.update(reason=reason, last_failure=now, next_probe=now + delay)
+            self._data[self._key(namespace, symbol)] = e
+            self._save()
+
+    def record_success(self, namespace: str, symbol: str) -> None:
+        with self._lock:
+            if self._data.pop(self._key(namespace, symbol), None) is not None:
+                self._save()
+
+    def dead_symbols(self, namespace: str | None = None) -> list[dict]:
+        """Liste des symboles marqués morts (triée par nombre d'échecs décroissant)."""
+        with self._lock:
+            items = list(self._data.items())
+        out = []
+        for key, e in items:
+            ns, sym = key.split(":", 1)
+            if namespace is not None and ns != namespace:
+                continue
+            out.append({
+                "namespace": ns,
+                "symbol": sym,
+                "failures": e.get("failures", 0),
+                "reason": e.get("reason", ""),
+                "next_probe": datetime.fromtimestamp(e.get("next_probe", 0)).strftime("%Y-%m-%d %H:%M"),
+            })
+        return sorted(out, key=lambda d: (-d["failures"], d["symbol"]))
+
+
+_HEALTH: SymbolHealth | None = None
+_HEALTH_LOCK = threading.Lock()
+
+def get_health() -> SymbolHealth:
+    """Registre de santé du process (cache_dir/symbol_health.json)."""
+    global _HEALTH
+    with _HEALTH_LOCK:
+        if _HEALTH is None:
+            _HEALTH = SymbolHealth.from_config()
+        return _HEALTH
+
+def dead_symbols(namespace: str | None = None) -> list[dict]:
+    return get_health().dead_symbols(namespace)
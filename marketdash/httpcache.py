@@ -0,0 +1,146 @@
+"""
+Cache disque des réponses HTTP JSON (utilisé par `te_get`).
+
+- clé = URL + paramètres triés (hors clés d'API)
+- TTL par endpoint (plus long préfixe de chemin qui matche)
+- revalidation conditionnelle (ETag / Last-Modified) une fois le TTL passé
+- taille bornée : éviction LRU (mtime rafraîchi à chaque hit)
+
+Config (config.yaml) :
+
+    http_cache:
+      enabled: true
+      max_mb: 50
+      default_ttl: 3600        # secondes
+      ttl:
+        historical/: 21600
+"""
+from __future__ import annotations
+from pathlib import Path
+import hashlib, json, os, threading, time
+
+from .config import load_config
+from .utils import ensure_dir
+
+# paramètres à ne jamais inclure dans la clé (credentials)
+_SECRET_PARAMS = {"c", "api_key", "apikey", "key"}
+
+
+class ResponseCache:
+    """Cache fichier (1 JSON par réponse) avec TTL par endpoint et éviction LRU."""
+
+    def __init__(self, root: str | Path, max_bytes: int = 50 * 2**20,
+                 default_ttl: float = 3600.0, ttls: dict[str, float] | None = None):
+        self.root = ensure_dir(root)
+        self.max_bytes = int(max_bytes)
+        self.default_ttl = float(default_ttl)
+        # préfixes les plus longs d'abord
+        self.ttls = sorted(((p.lstrip("/"), float(t)) for p, t in (ttls or {}).items()),
+                           key=lambda kv: -len(kv[0]))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: dict | None = None) -> "ResponseCache | None":
+        """Cache configuré par `http_cache`, ou None s'il est désactivé."""
+        cfg = cfg if cfg is not None else load_config()
+        hc = cfg.get("http_cache") or {}
+        if not hc.get("enabled", False):
+            return None
+        return cls(
+            Path(cfg["cache_dir"]) / "http",
+            max_bytes=int(float(hc.get("max_mb", 50)) * 2**20),
+            default_ttl=hc.get("default_ttl", 3600),
+            ttls=hc.get("ttl") or {},
+        )
+
+    # ---------- clés / TTL ----------
+    @staticmethod
+    def key(url: str, params: dict | None) -> str:
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k not in _SECRET_PARAMS)
+        raw = json.dumps([url, items], ensure_ascii=False)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, path: str) -> float:
+        path = path.lstrip("/")
+        for prefix, ttl in self.ttls:
+            if path.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    # ---------- lecture / écriture ----------
+    def get(self, key: str) -> dict | None:
+        p = self._path(key)
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        self.touch(key)
+        return entry
+
+    def is_fresh(self, entry: dict, path: str) -> bool:
+        return (time.time() - entry.get("stored_at", 0)) < self.ttl_for(path)
+
+    @staticmethod
+    def validators(entry: dict | None) -> dict:
+        """En-têtes de revalidation conditionnelle pour une entrée existante."""
+        h = {}
+        if entry:
+            if entry.get("etag"):
+                h["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                h["If-Modified-Since"] = entry["last_modified"]
+        return h
+
+    def put(self, key: str, body, headers=None) -> None:
+        headers = headers or {}
+        entry = {
+            "stored_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "body": body,
+        }
+        p = self._path(key)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, p)
+        self.evict()
+
+    def revalidated(self, key: str, entry: dict) -> None:
+        """Le serveur a répondu 304 : l'entrée repart pour un TTL."""
+        entry["stored_at"] = time.time()
+        self.put(key, entry["body"], {"ETag": entry.get("etag"),
+                                      "Last-Modified": entry.get("last_modified")})
+
+    def touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    # ---------- éviction ----------
+    def evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de `max_bytes`."""
+        with self._lock:
+            files = []
+            total = 0
+            for p in self.root.glob("*.json"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, p in sorted(files):
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                if total <= self.max_bytes:
+                    break
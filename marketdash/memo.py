@@ -0,0 +1,104 @@
+"""
+Mémoïsation en mémoire (process) des séries de prix.
+
+Utile quand les dashboards tournent dans un process long (notebook,
+scheduler) : un même ticker n'est chargé qu'une fois par TTL, et toute
+fenêtre incluse dans une fenêtre déjà chargée est servie par découpage.
+Les séries sont gardées en `PriceSeries` (deux tableaux numpy) : un
+découpage est une vue, sans copie.
+
+Config (config.yaml) :
+
+    memo:
+      ttl_seconds: 300
+      max_entries: 512
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from datetime import datetime
+import threading, time
+import pandas as pd
+
+from .config import load_config
+from .series import PriceSeries
+
+
+class SeriesMemo:
+    """Cache LRU thread-safe {clé -> (début, fin, série)} avec TTL."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 512):
+        self.ttl = float(ttl)
+        self.max_entries = max(1, int(max_entries))
+        self._data: OrderedDict[str, tuple[pd.Timestamp, pd.Timestamp, PriceSeries, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _window(start: datetime, end: datetime) -> tuple[pd.Timestamp, pd.Timestamp]:
+        # granularité jour : `end=datetime.now()` reste un hit dans la journée
+        return pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+
+    def get(self, key: str, start: datetime, end: datetime) -> PriceSeries | None:
+        """Série sur [start, end] si une fenêtre fraîche la couvre, sinon None."""
+        s0, e0 = self._window(start, end)
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            c0, c1, s, t = hit
+            if time.time() - t >= self.ttl:
+                del self._data[key]
+                return None
+            if c0 > s0 or c1 < e0:
+                return None
+            self._data.move_to_end(key)
+        return s.slice(s0, e0)
+
+    def put(self, key: str, start: datetime, end: datetime, s: PriceSeries) -> None:
+        """
+        Mémorise `s` couvrant [start, end]. Une fenêtre fraîche qui la
+        chevauche est fusionnée (la fenêtre mémorisée ne fait que grandir).
+        """
+        s0, e0 = self._window(start, end)
+        now = time.time()
+        with self._lock:
+            old = self._data.get(key)
+            if old is not None and now - old[3] < self.ttl and old[0] <= e0 and old[1] >= s0:
+                o0, o1, os_, ot = old
+                # Adj Close recalculé depuis (dividende, split) : l'ancien historique suit
+                factor = os_.restatement(s)
+                merged = (os_.scale(factor) if factor is not None else os_).merge(s)
+                # on garde l'horodatage le plus ancien : le TTL borne l'âge des données
+                self._data[key] = (min(o0, s0), max(o1, e0), merged, ot)
+            else:
+                self._data[key] = (s0, e0, s, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_MEMO: SeriesMemo | None = None
+_MEMO_LOCK = threading.Lock()
+
+def get_memo() -> SeriesMemo:
+    """Mémo des prix Yahoo du process (paramétré par la section `memo`)."""
+    global _MEMO
+    with _MEMO_LOCK:
+        if _MEMO is None:
+            m = load_config().get("memo") or {}
+            _MEMO = SeriesMemo(m.get("ttl_seconds", 300), m.get("max_entries", 512))
+        return _MEMO
+
+def configure_memo(ttl: float | None = None, max_entries: int | None = None) -> SeriesMemo:
+    """Change TTL / taille du mémo du process (vidé au passage)."""
+    memo = get_memo()
+    with memo._lock:
+        if ttl is not None:
+            memo.ttl = float(ttl)
+        if max_entries is not None:
+            memo.max_entries = max(1, int(max_entries))
+        memo._data.clear()
+    return memo
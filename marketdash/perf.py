@@ -0,0 +1,368 @@
+"""
+Moteur de perfs vectorisé (panel date x instrument).
+
+Toutes les séries sont alignées une fois dans un tableau 2-D ; les niveaux
+et les points de référence de chaque horizon sont résolus par positions
+(searchsorted / décalage en jours ouvrés), puis toutes les perfs sont
+calculées en opérations tableau, sans boucle Python par instrument.
+"""
+from __future__ import annotations
+from datetime import datetime
+from typing import Callable
+import numpy as np
+import pandas as pd
+
+from .series import PriceSeries, align, as_price_series, weekday
+
+# horizons en jours ouvrés (même convention que BDay(n))
+BDAY_HORIZONS = {"perf_5d": 5, "perf_1m": 21, "perf_3m": 63}
+
+PERF_COLUMNS = ["universe", "sector", "level", "perf_5d", "perf_1m", "perf_3m", "perf_ytd"]
+
+
+def ffill_values(v: np.ndarray) -> np.ndarray:
+    """Forward-fill colonne par colonne d'un tableau (T x N)."""
+    if v.size == 0:
+        return v.copy()
+    valid = ~np.isnan(v)
+    idx = np.where(valid, np.arange(v.shape[0])[:, None], 0)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    # avant la 1ère observation, idx=0 pointe sur une ligne NaN : reste NaN
+    return v[idx, np.arange(v.shape[1])]
+
+
+def last_valid_pos(v: np.ndarray) -> np.ndarray:
+    """Position de la dernière valeur non-NaN par colonne (-1 si aucune)."""
+    if v.shape[0] == 0:
+        return np.full(v.shape[1], -1, dtype=np.int64)
+    valid = ~np.isnan(v)
+    pos = v.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), pos, -1).astype(np.int64)
+
+
+def pct_values(level: np.ndarray, ref: np.ndarray) -> np.ndarray:
+    """(level / ref - 1) * 100, NaN si ref nul ou manquant."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = (level / ref - 1.0) * 100.0
+    out[(ref == 0) | np.isnan(ref) | np.isnan(level)] = np.nan
+    return out
+
+
+class PricePanel:
+    """
+    Panel aligné : `dates` (T,) datetime64[ns] trié, `values` (T x N) float64,
+    `labels` (N,). Les colonnes sans donnée sont entièrement NaN.
+    """
+    __slots__ = ("dates", "values", "labels", "_ffilled", "_last")
+
+    def __init__(self, dates: np.ndarray, values: np.ndarray, labels: list[str]):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.values = np.asarray(values, dtype=np.float64)
+        self.labels = list(labels)
+        self._ffilled = None
+        self._last = None
+
+    # ---------- construction ----------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, business_days: bool = False) -> "PricePanel":
+        """
+        DataFrame (date x label) -> panel. Avec `business_days`, le panel est
+        ré-indexé sur le calendrier jours ouvrés complet (équivalent d'un
+        `asfreq("B")` par série : les observations du week-end sont ignorées).
+        """
+        df = df.sort_index()
+        if not business_days or not len(df.index):
+            return cls(df.index.values, df.to_numpy(dtype=np.float64, na_value=np.nan), list(df.columns))
+
+        # comme asfreq("B") : la série s'arrête au dernier jour ouvré <= sa
+        # dernière observation (même si celle-ci tombe un week-end)
+        raw = df.to_numpy(dtype=np.float64, na_value=np.nan)
+        raw_last = last_valid_pos(raw)
+        last_dates = np.where(raw_last >= 0, df.index.values[np.maximum(raw_last, 0)],
+                              np.datetime64("NaT"))
+        bdf = df[df.index.dayofweek < 5]
+        if not len(bdf.index):
+            return cls(bdf.index.values, bdf.to_numpy(dtype=np.float64, na_value=np.nan), list(df.columns))
+        full = pd.bdate_range(bdf.index[0].normalize(), df.index[-1].normalize())
+        bdf = bdf.reindex(full)
+        pp = cls(full.values, bdf.to_numpy(dtype=np.float64, na_value=np.nan), list(df.columns))
+        pos = np.searchsorted(pp.dates, last_dates.astype("datetime64[ns]"), side="right") - 1
+        pos[np.isnat(last_dates)] = -1
+        pp._last = pos.astype(np.int64)
+        return pp
+
+    @classmethod
+    def from_series_map(cls, series_map: dict, business_days: bool = False) -> "PricePanel":
+        """
+        {label -> PriceSeries / Series / DataFrame / array} -> panel. Les
+        PriceSeries sont alignées sans copie intermédiaire ; le reste est
+        converti une fois (`as_price_series`). Un label non convertible
+        donne une colonne vide.
+        """
+        series = []
+        for label, obj in series_map.items():
+            try:
+                series.append(as_price_series(obj, label))
+            except Exception:
+                series.append(PriceSeries.empty(label))
+        return cls.from_price_series(series, list(series_map), business_days=business_days)
+
+    @classmethod
+    def from_price_series(cls, series: list[PriceSeries], labels: list[str],
+                          business_days: bool = False) -> "PricePanel":
+        """
+        Aligne des PriceSeries en une passe (cf. `series.align`). Avec
+        `business_days`, même calendrier que `from_frame(..., business_days=True)`.
+        """
+        if not business_days:
+            days, values = align(series)
+            return cls(days.astype("datetime64[D]"), values, labels)
+
+        # jours ouvrés entre la 1ère obs. en semaine et la dernière obs. (toutes séries)
+        firsts = [s.days[weekday(s.days) < 5][:1] for s in series]
+        firsts = np.concatenate(firsts) if firsts else np.empty(0, dtype=np.int64)
+        if not len(firsts):
+            return cls(np.empty(0, dtype="datetime64[D]"), np.empty((0, len(labels))), labels)
+        end = max(int(s.days[-1]) for s in series if len(s.days))
+        grid = np.arange(firsts.min(), end + 1, dtype=np.int64)
+        grid = grid[weekday(grid) < 5]
+        days, values = align(series, grid)
+        pp = cls(days.astype("datetime64[D]"), values, labels)
+        last = np.array([s.days[-1] if len(s.days) else np.iinfo(np.int64).min for s in series],
+                        dtype=np.int64)
+        pos = np.searchsorted(grid, last, side="right") - 1
+        pos[last == np.iinfo(np.int64).min] = -1
+        pp._last = pos.astype(np.int64)
+        return pp
+
+    # ---------- vues calculées une fois ----------
+    @property
+    def ffilled(self) -> np.ndarray:
+        if self._ffilled is None:
+            self._ffilled = ffill_values(self.values)
+        return self._ffilled
+
+    @property
+    def last_pos(self) -> np.ndarray:
+        if self._last is None:
+            self._last = last_valid_pos(self.values)
+        return self._last
+
+    def _take(self, pos: np.ndarray) -> np.ndarray:
+        """Valeur (ffill) à la position `pos` de chaque colonne, NaN si pos < 0."""
+        n = len(self.labels)
+        if n == 0:
+            return np.empty(0)
+        ok = pos >= 0
+        out = np.full(n, np.nan)
+        cols = np.arange(n)
+        out[ok] = self.ffilled[pos[ok], cols[ok]]
+        return out
+
+    def with_values(self, values: np.ndarray) -> "PricePanel":
+        """Même calendrier / mêmes dernières observations, autres valeurs (ex. converties)."""
+        pp = PricePanel(self.dates, values, self.labels)
+        pp._last = self._last
+        return pp
+
+    def level(self) -> np.ndarray:
+        """Dernier niveau de chaque colonne."""
+        return self._take(self.last_pos)
+
+    def last_dates(self) -> np.ndarray:
+        """Date de la dernière observation de chaque colonne (NaT si aucune)."""
+        out = np.full(len(self.labels), np.datetime64("NaT"), dtype="datetime64[ns]")
+        ok = self.last_pos >= 0
+        out[ok] = self.dates[self.last_pos[ok]]
+        return out
+
+    # ---------- références ----------
+    def asof(self, ref_dates) -> np.ndarray:
+        """
+        Dernière valeur <= `ref_dates` (scalaire ou une date par colonne),
+        bornée à la dernière observation de chaque colonne.
+        """
+        ref = np.broadcast_to(np.asarray(ref_dates, dtype="datetime64[ns]"), (len(self.labels),))
+        pos = np.searchsorted(self.dates, ref, side="right") - 1
+        pos = np.minimum(pos, self.last_pos)
+        pos[np.isnat(ref) | (self.last_pos < 0)] = -1
+        return self._take(pos)
+
+    def shifted(self, periods: int) -> np.ndarray:
+        """Valeur `periods` lignes avant la dernière observation de chaque colonne."""
+        pos = self.last_pos - periods
+        pos[self.last_pos < 0] = -1
+        return self._take(pos)
+
+    def perf_vs(self, ref_dates) -> np.ndarray:
+        return pct_values(self.level(), self.asof(ref_dates))
+
+
+def _in_base(pp: PricePanel, base_currency: str | None, currencies: dict | None) -> PricePanel:
+    """Panel converti dans `base_currency` (None -> inchangé), cf. marketdash.fx."""
+    if not base_currency:
+        return pp
+    from .fx import translate_values
+    ccys = [(currencies or {}).get(label) for label in pp.labels]
+    return pp.with_values(translate_values(pp.dates, pp.values, ccys, base_currency))
+
+
+def perf_table(series_map: dict, universe_name: str, today: datetime | None = None,
+               base_currency: str | None = None, currencies: dict | None = None) -> pd.DataFrame:
+    """
+    Version vectorisée de `compute_perf_table` (même schéma de sortie) :
+    calendrier jours ouvrés + ffill, perf 5D / 1M / 3M par décalage de
+    5 / 21 / 63 jours ouvrés depuis la dernière observation, YTD vs la
+    dernière valeur <= 31/12 de l'année précédente.
+
+    Avec `base_currency` (+ `currencies` : {label -> devise}), les perfs
+    sont calculées en devise de référence ; `level` reste en devise locale.
+    """
+    from .utils import last_business_day
+
+    today = today or last_business_day(datetime.now())
+    pp = PricePanel.from_series_map(series_map, business_days=True)
+    level = pp.level()
+    pp = _in_base(pp, base_currency, currencies)
+    perf_level = pp.level()
+
+    out = {
+        "universe": universe_name,
+        "sector": pp.labels,
+        "level": level,
+    }
+    for col, n in BDAY_HORIZONS.items():
+        out[col] = pct_values(perf_level, pp.shifted(n))
+    y0 = np.datetime64(f"{today.year - 1}-12-31")
+    out["perf_ytd"] = pct_values(perf_level, pp.asof(y0))
+    return pd.DataFrame(out, columns=PERF_COLUMNS)
+
+
+# ---------- exécution par blocs (univers plus gros que la mémoire) ----------
+# octets par cellule (jour ouvré x instrument) d'un bloc :
+#   séries sources (jours int64 + valeurs float64)                    16
+#   `align` : copies concaténées 16, colonnes + positions 16,
+#             masque 1, tableau aligné 8 (libérés sauf ce dernier)     41
+#   ffill 8 ; conversion de devise : facteurs, valeurs, ffill 24      32
+# pic ~57 pendant l'alignement, ~56 ensuite : 80 garde ~40 % de marge
+CELL_BYTES = 80
+
+
+def perf_memory_mb() -> float:
+    from .config import load_config
+    return float((load_config().get("perf") or {}).get("memory_mb", 512))
+
+
+def block_size(rows: int, memory_mb: float) -> int:
+    """Nombre d'instruments par bloc pour tenir dans `memory_mb` avec `rows` jours ouvrés."""
+    return max(1, int(memory_mb * 2**20 // (max(int(rows), 1) * CELL_BYTES)))
+
+
+def perf_table_chunked(symbols: dict[str, str], universe_name: str,
+                       load: Callable[[list[str]], dict[str, PriceSeries]] | None = None,
+                       today: datetime | None = None, memory_mb: float | None = None,
+                       rows_hint: int = 252 * 40, base_currency: str | None = None,
+                       currencies: dict | None = None) -> pd.DataFrame:
+    """
+    `perf_table` par blocs de symboles ({label -> symbole}) : chaque bloc
+    est chargé (`load(symboles) -> {symbole -> PriceSeries}`, défaut :
+    store Yahoo), calculé puis libéré ; seules les lignes de résultat
+    restent en mémoire. Les perfs d'un instrument ne dépendent pas des
+    autres colonnes : le résultat est identique au calcul en une fois.
+
+    La taille des blocs vise `memory_mb` (défaut : `perf.memory_mb` de
+    config.yaml) d'après le plus long calendrier vu (`rows_hint` au départ).
+    """
+    if load is None:
+        from .store import get_store
+        store = get_store("yahoo")
+        load = lambda syms: {s: store.load(s) for s in syms}
+    memory_mb = perf_memory_mb() if memory_mb is None else float(memory_mb)
+
+    items = list(symbols.items())
+    rows, i, parts = int(rows_hint), 0, []
+    while i < len(items):
+        block = items[i:i + block_size(rows, memory_mb)]
+        loaded = load([sym for _, sym in block])
+        i += len(block)
+        # calendrier réel du bloc : s'il dépasse l'estimation, le bloc est
+        # recoupé et les blocs suivants sont plus petits
+        spans = [(s.first_day(), s.last_day()) for s in loaded.values() if len(s)]
+        if spans:
+            rows = max(rows, (max(e for _, e in spans) - min(b for b, _ in spans)) * 5 // 7 + 1)
+        step = block_size(rows, memory_mb)
+        for k in range(0, len(block), step):
+            sub = block[k:k + step]
+            part = {label: loaded.get(sym, PriceSeries.empty(label)) for label, sym in sub}
+            ccys = {label: (currencies or {}).get(label) for label, _ in sub}
+            parts.append(perf_table(part, universe_name, today=today,
+                                    base_currency=base_currency, currencies=ccys))
+        del loaded
+    if not parts:
+        return pd.DataFrame(columns=PERF_COLUMNS)
+    return pd.concat(parts, ignore_index=True)
+
+
+def perf_history(series_map: dict, universe_name: str, long: bool = True,
+                 base_currency: str | None = None, currencies: dict | None = None) -> pd.DataFrame:
+    """
+    Table de perfs pour CHAQUE date du calendrier jours ouvrés, en une passe :
+    chaque ligne t vaut ce que `compute_perf_table` aurait donné avec
+    l'historique arrêté à t (perf 5D / 1M / 3M par décalage de 5 / 21 / 63
+    jours ouvrés depuis la dernière observation <= t, YTD vs dernière
+    valeur <= 31/12 de l'année précédant t). Tout est résolu par
+    indexation de tableaux, sans boucle sur les dates.
+
+    `long=True`  -> colonnes universe, date, sector, level, perf_5d, perf_1m, perf_3m, perf_ytd
+    `long=False` -> colonnes MultiIndex (métrique, label), index = dates
+    Les dates après la dernière observation d'une série restent NaN.
+    `base_currency` / `currencies` : comme `perf_table`.
+    """
+    pp = PricePanel.from_series_map(series_map, business_days=True)
+    local = pp.ffilled
+    pp = _in_base(pp, base_currency, currencies)
+    F = pp.ffilled
+    T, N = F.shape
+    cols = np.arange(N)
+
+    # L[t, j] = ligne de la dernière observation de j <= t (-1 avant la 1ère) ;
+    # une dernière observation du week-end compte, comme dans `perf_table`,
+    # au dernier jour ouvré qui la précède (`last_pos`)
+    rows = np.arange(T)[:, None]
+    obs = ~np.isnan(pp.values)
+    ends = pp.last_pos >= 0
+    obs[pp.last_pos[ends], cols[ends]] = True
+    L = np.where(obs, rows, -1)
+    np.maximum.accumulate(L, axis=0, out=L)
+    alive = (L >= 0) & (rows <= pp.last_pos[None, :])
+    level = np.where(alive, F, np.nan)   # niveau des perfs (devise de référence)
+
+    def at(pos: np.ndarray) -> np.ndarray:
+        ok = alive & (pos >= 0)
+        out = np.full((T, N), np.nan)
+        out[ok] = F[pos[ok], np.broadcast_to(cols, (T, N))[ok]]
+        return out
+
+    metrics = {"level": np.where(alive, local, np.nan)}
+    for col, n in BDAY_HORIZONS.items():
+        metrics[col] = pct_values(level, at(L - n))
+
+    # YTD : dernière ligne <= 31/12 de l'année précédant t, bornée à L
+    years = pp.dates.astype("datetime64[Y]")
+    y0_pos = np.searchsorted(pp.dates, years.astype("datetime64[ns]"), side="left") - 1
+    metrics["perf_ytd"] = pct_values(level, at(np.minimum(y0_pos[:, None], L)))
+
+    dates = pd.DatetimeIndex(pp.dates, name="date")
+    if not long:
+        return pd.concat(
+            {m: pd.DataFrame(v, index=dates, columns=pp.labels) for m, v in metrics.items()},
+            axis=1,
+        )
+    out = pd.DataFrame({
+        "universe": universe_name,
+        "date": np.repeat(pp.dates, N),
+        "sector": np.tile(np.asarray(pp.labels, dtype=object), T),
+        **{m: v.ravel() for m, v in metrics.items()},
+    })
+    return out[out["level"].notna()].reset_index(drop=True)
+
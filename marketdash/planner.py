@@ -0,0 +1,99 @@
+"""
+Planification des fetchs d'un build complet.
+
+Chaque script peut exposer `fetch_plan() -> list[FetchNeed]` (symboles et
+fenêtres dont il a besoin). `build_all` rassemble ces besoins, fusionne
+les fenêtres par symbole et télécharge chaque symbole une seule fois dans
+le store local ; les étapes suivantes lisent ensuite le store (fetch
+récent -> aucun appel réseau, cf. `store_fresh_minutes`).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from importlib import import_module
+import os
+import pandas as pd
+
+from .providers import FRED_HOST, fred_history, yf_history_many
+from .scheduler import FetchScheduler
+
+
+@dataclass(frozen=True)
+class FetchNeed:
+    provider: str              # "yahoo" | "fred"
+    symbol: str
+    start: datetime | str
+    end: datetime | None = None  # None = maintenant
+
+
+def collect_needs(modules: list[str]) -> list[FetchNeed]:
+    """Besoins déclarés par les modules (ceux sans `fetch_plan` sont ignorés)."""
+    needs: list[FetchNeed] = []
+    for name in modules:
+        mod = import_module(name)
+        plan = getattr(mod, "fetch_plan", None)
+        if plan is not None:
+            needs.extend(plan())
+    return needs
+
+
+def merge_needs(needs: list[FetchNeed]) -> dict[tuple[str, str], tuple[pd.Timestamp, pd.Timestamp]]:
+    """{(provider, symbole) -> (début, fin)} : enveloppe des fenêtres demandées."""
+    now = pd.Timestamp(datetime.now())
+    plan: dict[tuple[str, str], tuple[pd.Timestamp, pd.Timestamp]] = {}
+    for n in needs:
+        s0 = pd.Timestamp(n.start).normalize()
+        e0 = pd.Timestamp(n.end) if n.end is not None else now
+        key = (n.provider, n.symbol)
+        if key in plan:
+            a, b = plan[key]
+            plan[key] = (min(a, s0), max(b, e0))
+        else:
+            plan[key] = (s0, e0)
+    return plan
+
+
+def execute_plan(plan: dict[tuple[str, str], tuple[pd.Timestamp, pd.Timestamp]],
+                 fred_api_key: str | None = None) -> dict[str, int]:
+    """
+    Télécharge le plan dans le store : Yahoo par `yf_history_many` (une
+    passe par fenêtre distincte), FRED en parallèle via le scheduler.
+    Renvoie le nombre de symboles traités par provider.
+    """
+    yahoo: dict[tuple[pd.Timestamp, pd.Timestamp], list[str]] = {}
+    fred: dict[str, pd.Timestamp] = {}
+    for (provider, symbol), (start, end) in plan.items():
+        if provider == "yahoo":
+            yahoo.setdefault((start, end), []).append(symbol)
+        elif provider == "fred":
+            fred[symbol] = start
+
+    fred_api_key = fred_api_key or os.environ.get("FRED_API_KEY")
+    done = {"yahoo": 0, "fred": 0}
+    with FetchScheduler.from_config() as sched:
+        for (start, end), tickers in yahoo.items():
+            yf_history_many(tickers, start.to_pydatetime(), end.to_pydatetime(), scheduler=sched)
+            done["yahoo"] += len(tickers)
+
+        if fred and fred_api_key:
+            futures = {
+                sid: sched.submit(FRED_HOST, fred_history, sid, start=start, api_key=fred_api_key)
+                for sid, start in fred.items()
+            }
+            for sid, fut in futures.items():
+                try:
+                    fut.result()
+                    done["fred"] += 1
+                except Exception as e:
+                    print(f"⚠️ prefetch FRED {sid}: {e}")
+    return done
+
+
+def prefetch(modules: list[str]) -> dict[str, int]:
+    """Collecte + fusion + exécution du plan pour les modules donnés."""
+    needs = collect_needs(modules)
+    plan = merge_needs(needs)
+    done = execute_plan(plan)
+    print(f"📦 Plan de fetch : {len(needs)} besoins -> {len(plan)} symboles distincts "
+          f"(yahoo={done['yahoo']}, fred={done['fred']})")
+    return done
@@ -1,15 +1,92 @@
 from __future__ import annotations
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-import os, time, json, requests
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import os, random, threading, time, json, requests
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from requests.adapters import HTTPAdapter
 
-# ---------- Yahoo Finance ----------
-def yf_history(ticker: str, start: datetime, end: datetime) -> pd.Series:
+from .config import load_config
+from .health import get_health
+from .httpcache import ResponseCache
+from .memo import get_memo
+from .scheduler import FetchScheduler
+from .series import PriceSeries, to_frame
+from .store import get_store, is_fresh
+
+# ---------- HTTP (session partagée) ----------
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+def http_session() -> requests.Session:
     """
-    Série de prix (Adj Close/Close) sur [start, end], index datetime naive.
-    Renvoie une Series vide si rien.
+    Session HTTP unique du process : connexions keep-alive réutilisées
+    (un pool par hôte, dimensionné sur `fetch.max_workers`).
     """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            size = int((load_config().get("fetch") or {}).get("max_workers", 8))
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(size, 1), max_retries=0)
+            sess = requests.Session()
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _SESSION = sess
+        return _SESSION
+
+def _retry_after(r: requests.Response) -> float | None:
+    """Délai demandé par le serveur (Retry-After en secondes ou date HTTP)."""
+    v = r.headers.get("Retry-After")
+    if not v:
+        return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(v)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def http_get(url: str, params: dict | None = None, timeout: float = 20,
+             retries: int = 4, backoff: float = 0.5, max_backoff: float = 30.0,
+             headers: dict | None = None) -> requests.Response:
+    """
+    GET via la session partagée, avec retries sur 429 / 5xx / erreurs réseau :
+    attente exponentielle avec jitter (full jitter), ou `Retry-After` si fourni.
+    La dernière réponse est renvoyée telle quelle (à l'appelant de raise_for_status).
+    """
+    sess = http_session()
+    for attempt in range(retries + 1):
+        delay = None
+        try:
+            r = sess.get(url, params=params, timeout=timeout, headers=headers)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            if r.status_code not in RETRY_STATUS or attempt == retries:
+                return r
+            delay = _retry_after(r)
+        if delay is None:
+            delay = random.uniform(0.0, min(max_backoff, backoff * (2 ** attempt)))
+        time.sleep(min(delay, max_backoff * 2))
+    raise RuntimeError("unreachable")  # pragma: no cover
+
+# ---------- Yahoo Finance ----------
+YAHOO_HOST = "query2.finance.yahoo.com"
+# barres stockées re-demandées à chaque fetch de queue : témoins d'un
+# ajustement rétroactif de l'Adj Close (cf. SeriesStore.merge(restate=True))
+YF_OVERLAP_BARS = 5
+
+def _yf_download(ticker: str, start: datetime, end: datetime) -> PriceSeries:
+    """Téléchargement brut Yahoo sur [start, end] (sans store)."""
     df = yf.download(
         ticker,
         start=start.strftime("%Y-%m-%d"),
@@ -18,36 +95,221 @@ def yf_history(ticker: str, start: datetime, end: datetime) -> pd.Series:
         auto_adjust=False,
     )
     if df is None or df.empty:
-        return pd.Series(dtype=float)
+        return PriceSeries.empty(ticker)
     s = df["Adj Close"] if "Adj Close" in df.columns else df["Close"]
-    s.index = pd.to_datetime(s.index).tz_localize(None)
-    return s.dropna()
+    if isinstance(s, pd.DataFrame):  # colonnes MultiIndex (Price, Ticker)
+        s = s.iloc[:, 0]
+    return PriceSeries.from_arrays(pd.to_datetime(s.index).tz_localize(None).values,
+                                   s.to_numpy(dtype=float, na_value=float("nan")), ticker)
+
+def _yf_download_many(tickers: list[str], start: datetime, end: datetime) -> pd.DataFrame:
+    """Téléchargement Yahoo groupé (1 requête) -> DataFrame (date x ticker)."""
+    df = yf.download(
+        tickers,
+        start=start.strftime("%Y-%m-%d"),
+        end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
+        progress=False,
+        auto_adjust=False,
+        group_by="column",
+    )
+    if df is None or df.empty:
+        return pd.DataFrame(columns=tickers, dtype=float)
+    px = df["Adj Close"] if "Adj Close" in df.columns.get_level_values(0) else df["Close"]
+    if isinstance(px, pd.Series):  # ancien yfinance, un seul ticker
+        px = px.to_frame(tickers[0])
+    px.index = pd.to_datetime(px.index).tz_localize(None)
+    return px.astype(float)
+
+def _note_health(ticker: str, s: PriceSeries | None, reason: str = "empty") -> None:
+    """Met à jour le cache négatif après un fetch (vide -> échec)."""
+    if s is None or not len(s):
+        get_health().record_failure("yahoo", ticker, reason)
+    else:
+        get_health().record_success("yahoo", ticker)
+
+def yf_history(ticker: str, start: datetime, end: datetime,
+               use_store: bool = True, use_memo: bool = True,
+               as_pandas: bool = True) -> pd.Series | PriceSeries:
+    """
+    Série de prix (Adj Close/Close) sur [start, end], index datetime naive.
+    Renvoie une Series vide si rien (`as_pandas=False` -> PriceSeries).
+
+    Avec `use_store`, la série est lue dans le store local (cache_dir)
+    et seule la queue manquante est re-téléchargée, avec quelques barres
+    de recouvrement : un Adj Close recalculé (dividende, split) est
+    reporté sur l'historique stocké sans tout re-télécharger. Avec `use_memo`,
+    une fenêtre déjà chargée dans le process (TTL) est resservie.
+    """
+    memo = get_memo() if use_memo else None
+    if memo is not None:
+        hit = memo.get(ticker, start, end)
+        if hit is not None:
+            return hit.to_pandas() if as_pandas else hit
+
+    health = get_health()
+    dead = health.should_skip("yahoo", ticker)  # symbole mort : pas de requête
+    if not use_store:
+        s = PriceSeries.empty(ticker) if dead else _yf_download(ticker, start, end)
+        if not dead:
+            _note_health(ticker, s)
+    else:
+        store = get_store("yahoo")
+        fetch_from, covered = store.plan_fetch(ticker, start, end, overlap=YF_OVERLAP_BARS)
+        if fetch_from is None or dead:
+            s = store.load(ticker)
+        else:
+            s = store.record_fetch(ticker, _yf_download(ticker, fetch_from, end), covered, end,
+                                   restate=True)
+            _note_health(ticker, s)
+        s = s.slice(pd.Timestamp(start).normalize(), end)
+
+    if memo is not None:
+        memo.put(ticker, start, end, s)
+    return s.to_pandas() if as_pandas else s
+
+def yf_history_many(tickers: list[str], start: datetime, end: datetime,
+                    chunk_size: int = 25, use_store: bool = True, use_memo: bool = True,
+                    scheduler: FetchScheduler | None = None,
+                    as_frame: bool = True) -> pd.DataFrame | dict[str, PriceSeries]:
+    """
+    Panel de prix (date x ticker) sur [start, end], colonnes dans l'ordre
+    de `tickers` (colonne vide si rien). `as_frame=False` renvoie
+    {ticker -> PriceSeries} sans construire de DataFrame.
+
+    Les tickers sont téléchargés par paquets de `chunk_size` en un seul
+    `yf.download` par paquet ; les paquets passent en parallèle par le
+    `scheduler` (limite de débit Yahoo). Avec `use_store`, seuls les tickers
+    dont la queue manque partent sur le réseau, regroupés par date de début.
+    Avec `use_memo`, les tickers déjà chargés dans le process sont resservis.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    start_day = pd.Timestamp(start).normalize()
+    store = get_store("yahoo") if use_store else None
+    memo = get_memo() if use_memo else None
+
+    memo_hits: dict[str, PriceSeries] = {}
+    if memo is not None:
+        for t in tickers:
+            hit = memo.get(t, start, end)
+            if hit is not None:
+                memo_hits[t] = hit
+
+    # tickers à télécharger, regroupés par début de fetch
+    health = get_health()
+    groups: dict[pd.Timestamp, list[str]] = {}
+    covered: dict[str, str] = {}
+    for t in tickers:
+        if t in memo_hits or health.should_skip("yahoo", t):
+            continue
+        if store is None:
+            groups.setdefault(start_day, []).append(t)
+            continue
+        fetch_from, covered[t] = store.plan_fetch(t, start, end, overlap=YF_OVERLAP_BARS)
+        if fetch_from is not None:
+            groups.setdefault(fetch_from, []).append(t)
+
+    def fetch_chunk(chunk: list[str], fetch_from: pd.Timestamp) -> dict[str, PriceSeries]:
+        try:
+            px = _yf_download_many(chunk, fetch_from, end)
+        except Exception as e:
+            # erreur de transport (coupure, 429 après retries) : rien n'est appris sur
+            # les symboles, pas de cache négatif ; le store est resservi tel quel
+            print(f"⚠️ Yahoo {', '.join(chunk[:3])}{'...' if len(chunk) > 3 else ''} : {e}")
+            return {}
+        out = {}
+        dates = px.index.values
+        for t in chunk:
+            if t in px.columns:
+                new = PriceSeries.from_arrays(dates, px[t].to_numpy(dtype=float, na_value=float("nan")), t)
+            else:
+                new = PriceSeries.empty(t)
+            if store is not None:
+                new = store.record_fetch(t, new, covered[t], end, restate=True)
+            _note_health(t, new)
+            out[t] = new
+        return out
+
+    fetched: dict[str, PriceSeries] = {}
+    if groups:
+        ctx = nullcontext(scheduler) if scheduler is not None else FetchScheduler.from_config()
+        with ctx as sched:
+            futures = [
+                sched.submit(YAHOO_HOST, fetch_chunk, group[i:i + chunk_size], fetch_from)
+                for fetch_from, group in groups.items()
+                for i in range(0, len(group), chunk_size)
+            ]
+            for fut in futures:
+                fetched.update(fut.result())
+
+    cols = {}
+    for t in tickers:
+        if t in memo_hits:
+            cols[t] = memo_hits[t]
+            continue
+        if t in fetched:
+            s = fetched[t]
+        else:
+            s = store.load(t) if store is not None else PriceSeries.empty(t)
+        cols[t] = s.slice(start_day, end)
+        if memo is not None:
+            memo.put(t, start, end, cols[t])
+    if not as_frame:
+        return cols
+    return to_frame(cols, tickers)
 
 # ---------- TradingEconomics ----------
 _TE_BASE = "https://api.tradingeconomics.com"
+TE_HOST = urlparse(_TE_BASE).netloc
 
 def _te_key() -> str:
     k = os.getenv("TE_API_KEY", "").strip()
     return k  # peut être vide (limité)
 
-def te_get(path: str, **params) -> list[dict]:
+_TE_CACHE: ResponseCache | None = None
+_TE_CACHE_LOADED = False
+
+def _te_cache() -> ResponseCache | None:
+    global _TE_CACHE, _TE_CACHE_LOADED
+    if not _TE_CACHE_LOADED:
+        _TE_CACHE = ResponseCache.from_config()
+        _TE_CACHE_LOADED = True
+    return _TE_CACHE
+
+def te_get(path: str, timeout: float = 20, cache: bool = True, **params) -> list[dict]:
     """
     GET basique TE. Gère la clé, les erreurs simples et retourne du JSON.
+    (session partagée + backoff sur 429/5xx, cf. `http_get`)
+
+    Si `http_cache` est activé, la réponse est servie depuis le cache disque
+    tant que son TTL court, puis revalidée (ETag / Last-Modified).
     """
     params = {k: v for k, v in params.items() if v is not None}
     key = _te_key()
     if key:
         params["c"] = key
     url = f"{_TE_BASE.rstrip('/')}/{path.lstrip('/')}"
-    r = requests.get(url, params=params, timeout=20)
-    if r.status_code == 429:
-        time.sleep(1.0)
-        r = requests.get(url, params=params, timeout=20)
+
+    rc = _te_cache() if cache else None
+    entry = ck = None
+    if rc is not None:
+        ck = rc.key(url, params)
+        entry = rc.get(ck)
+        if entry is not None and rc.is_fresh(entry, path):
+            return entry["body"]
+
+    headers = rc.validators(entry) if rc is not None else None
+    r = http_get(url, params=params, timeout=timeout, headers=headers)
+    if r.status_code == 304 and entry is not None:
+        rc.revalidated(ck, entry)
+        return entry["body"]
     r.raise_for_status()
     try:
-        return r.json()
+        body = r.json()
     except json.JSONDecodeError:
         return []
+    if rc is not None:
+        rc.put(ck, body, r.headers)
+    return body
 
 def te_history(symbol: str, start: datetime | None = None, end: datetime | None = None) -> pd.Series:
     """
@@ -63,7 +325,112 @@ def te_history(symbol: str, start: datetime | None = None, end: datetime | None
     df = pd.DataFrame(data)
     if df.empty or "Date" not in df or "Value" not in df:
         return pd.Series(dtype=float)
-    dates = pd.to_datetime(df["Date"]).tz_localize(None)
-    out = pd.Series(df["Value"].astype(float).values, index=dates).sort_index().dropna()
-    return out
+    dates = pd.to_datetime(df["Date"]).dt.tz_localize(None).values
+    return PriceSeries.from_arrays(dates, pd.to_numeric(df["Value"], errors="coerce"), symbol).to_pandas()
+
+def _te_chunk(symbols: list[str], params: dict) -> pd.DataFrame:
+    """Une requête TE pour plusieurs symboles -> DataFrame (date x symbole)."""
+    data = te_get(f"historical/series/{','.join(symbols)}", **params)
+    if not data:
+        return pd.DataFrame(columns=symbols, dtype=float)
+    df = pd.DataFrame(data)
+    val_col = "Value" if "Value" in df else ("Close" if "Close" in df else None)
+    if df.empty or "Date" not in df or val_col is None:
+        return pd.DataFrame(columns=symbols, dtype=float)
+
+    # rattache chaque ligne au symbole demandé (TE peut changer la casse)
+    sym_col = next((c for c in ("Symbol", "symbol") if c in df), None)
+    if sym_col is None:
+        if len(symbols) != 1:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        df["_sym"] = symbols[0]
+    else:
+        wanted = {s.lower(): s for s in symbols}
+        df["_sym"] = df[sym_col].astype(str).str.lower().map(wanted)
+
+    df = df.dropna(subset=["_sym"])
+    df["Date"] = pd.to_datetime(df["Date"]).dt.tz_localize(None)
+    df[val_col] = pd.to_numeric(df[val_col], errors="coerce")
+    wide = df.pivot_table(index="Date", columns="_sym", values=val_col, aggfunc="last")
+    wide.columns.name = None
+    return wide
+
+def te_history_many(symbols: list[str], start: datetime | None = None, end: datetime | None = None,
+                    chunk_size: int = 10, scheduler: FetchScheduler | None = None) -> pd.DataFrame:
+    """
+    Historiques TE de plusieurs symboles -> DataFrame (date x symbole),
+    colonnes dans l'ordre de `symbols` (colonne vide si indisponible).
+
+    Une requête par paquet de `chunk_size` symboles (séparés par des
+    virgules) ; la réponse JSON est éclatée par symbole en une passe.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    params = {}
+    if start: params["d1"] = start.strftime("%Y-%m-%d")
+    if end:   params["d2"] = end.strftime("%Y-%m-%d")
+
+    chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+    parts = []
+    ctx = nullcontext(scheduler) if scheduler is not None else FetchScheduler.from_config()
+    with ctx as sched:
+        futures = [sched.submit(TE_HOST, _te_chunk, chunk, params) for chunk in chunks]
+        for fut in futures:
+            parts.append(fut.result())
+
+    panel = pd.concat(parts, axis=1) if parts else pd.DataFrame()
+    return panel.reindex(columns=symbols).sort_index()
+
+# ---------- FRED ----------
+_FRED_URL = "https://api.stlouisfed.org/fred/series/observations"
+FRED_HOST = urlparse(_FRED_URL).netloc
+
+def _fred_download(series_id: str, start: str, api_key: str, timeout: float = 30) -> PriceSeries:
+    """Observations FRED depuis `start` (YYYY-MM-DD) -> PriceSeries."""
+    params = {
+        "series_id": series_id,
+        "observation_start": start,
+        "api_key": api_key,
+        "file_type": "json",
+    }
+    r = http_get(_FRED_URL, params=params, timeout=timeout)
+    r.raise_for_status()
+    obs = r.json().get("observations", [])
+    if not obs:
+        return PriceSeries.empty(series_id)
+
+    dates = np.array([o["date"] for o in obs], dtype="datetime64[D]")
+    values = pd.to_numeric(pd.Series([o["value"] for o in obs]), errors="coerce")  # "." -> NaN
+    return PriceSeries.from_arrays(dates, values, series_id)
+
+def fred_history(series_id: str, start: str | datetime, api_key: str,
+                 incremental: bool = True, timeout: float = 30) -> pd.Series:
+    """
+    Série FRED depuis `start`, via le store local (cache_dir/store/fred).
+
+    En mode incrémental, on ne demande à FRED que les observations
+    postérieures à la dernière stockée (la dernière est re-demandée car
+    elle peut être révisée). `incremental=False` re-télécharge tout.
+    """
+    store = get_store("fred")
+    start_day = pd.Timestamp(start).normalize()
+    now = datetime.now()
+
+    if incremental:
+        fetch_from, covered = store.plan_fetch(series_id, start_day, now)
+        if fetch_from is None:
+            return store.load(series_id).slice(start_day).to_pandas()
+    else:
+        fetch_from, covered = start_day, start_day.strftime("%Y-%m-%d")
 
+    new = _fred_download(series_id, fetch_from.strftime("%Y-%m-%d"), api_key, timeout=timeout)
+    if incremental:
+        merged = store.record_fetch(series_id, new, covered, now)
+    else:
+        merged = new
+        store.write(
+            series_id, merged,
+            covered_from=covered,
+            fetched_through=now.strftime("%Y-%m-%d"),
+            fetched_at=time.time(),
+        )
+    return merged.rename(series_id).slice(start_day).to_pandas()
@@ -0,0 +1,261 @@
+"""
+Requêtes (période, fréquence) sur les tableaux des collecteurs et sur le store.
+
+    frame_panel("data/rates_fred", start="2020-10-01", freq="W-FRI")
+    get_panel({"US_10Y": "DGS10", "US_2Y": "DGS2"}, start="2020-10-01",
+              freq="W-FRI", namespace="fred")
+
+`frame_panel` lit un tableau écrit par un collecteur (`<nom>.cols`, ou le
+segment partagé de la session build_all) : projection des colonnes et
+recherche dichotomique sur les dates. `get_panel` lit directement les
+séries du store.
+
+Les vues ré-échantillonnées (dernière valeur de chaque période, comme
+`resample(freq).last()`) sont mémoïsées et persistées sous
+`cache_dir/views/`, indexées par l'empreinte du tableau (en-tête) ou du
+catalogue : chaque étape de build_all tourne dans un nouveau process et
+retrouve les vues du run précédent. Tant que la source ne change pas, une
+requête ne relit aucune donnée ; si seule sa queue a bougé, seules les
+dernières périodes sont recalculées.
+
+Fréquences : None / "D" (brut), "W" (= "W-SUN"), "W-MON" ... "W-SUN",
+"M" / "ME", "Q" / "QE", "Y" / "YE".
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import quote
+import hashlib, os, threading
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+from .frames import EXT, frame_path, read_frame, read_schema
+from .series import PriceSeries, to_day, to_frame, weekday
+from .store import get_store
+from .utils import ensure_dir
+
+_WEEKDAYS = {"MON": 0, "TUE": 1, "WED": 2, "THU": 3, "FRI": 4, "SAT": 5, "SUN": 6}
+MAX_VIEWS = 1024
+
+
+def normalize_freq(freq: str | None) -> str:
+    f = (freq or "D").upper()
+    f = {"W": "W-SUN", "ME": "M", "QE": "Q", "YE": "Y", "A": "Y"}.get(f, f)
+    if f in ("D", "M", "Q", "Y") or (f.startswith("W-") and f[2:] in _WEEKDAYS):
+        return f
+    raise ValueError(f"Fréquence non supportée : {freq!r}")
+
+
+def period_end(days: np.ndarray, freq: str) -> np.ndarray:
+    """Jour (epoch) de fin de période de chaque jour de `days`."""
+    if freq.startswith("W-"):
+        return days + (_WEEKDAYS[freq[2:]] - weekday(days)) % 7
+    months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    if freq == "Q":
+        months = months - months % 3 + 2
+    elif freq == "Y":
+        months = months - months % 12 + 11
+    return (months + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - 1
+
+
+class View:
+    """Série ré-échantillonnée : libellé de période, jour de la valeur retenue, valeur."""
+    __slots__ = ("labels", "src_days", "values")
+
+    def __init__(self, labels: np.ndarray, src_days: np.ndarray, values: np.ndarray):
+        self.labels, self.src_days, self.values = labels, src_days, values
+
+    @classmethod
+    def build(cls, s: PriceSeries, freq: str) -> "View":
+        if freq == "D":
+            return cls(s.days, s.days, s.values)
+        ends = period_end(s.days, freq)
+        last = np.flatnonzero(np.r_[ends[1:] != ends[:-1], True]) if len(ends) else ends
+        return cls(ends[last], s.days[last], s.values[last])
+
+    def extend(self, s: PriceSeries, freq: str) -> "View | None":
+        """
+        Vue de `s` en ne recalculant que depuis la dernière période connue,
+        si les périodes précédentes sont inchangées dans `s` (sinon None).
+        """
+        if freq == "D" or len(self.labels) < 2:
+            return None
+        keep = len(self.labels) - 1                     # la dernière période a pu bouger
+        pos = np.searchsorted(s.days, self.src_days[:keep])
+        if (pos >= len(s.days)).any():
+            return None
+        pos_ok = (s.days[pos] == self.src_days[:keep]) & (s.values[pos] == self.values[:keep])
+        # la valeur retenue doit rester la dernière de sa période
+        nxt = np.minimum(pos + 1, len(s.days) - 1)
+        still_last = (pos + 1 >= len(s.days)) | (period_end(s.days[nxt], freq) != self.labels[:keep])
+        if not (pos_ok & still_last).all():
+            return None
+        cut = int(np.searchsorted(s.days, self.labels[keep - 1], side="right"))
+        # une barre insérée dans une période jusque-là vide en crée une nouvelle
+        head = period_end(s.days[:cut], freq)
+        if int(np.count_nonzero(head[1:] != head[:-1])) + 1 != keep:
+            return None
+        tail = View.build(PriceSeries(s.days[cut:], s.values[cut:]), freq)
+        return View(np.concatenate([self.labels[:keep], tail.labels]),
+                    np.concatenate([self.src_days[:keep], tail.src_days]),
+                    np.concatenate([self.values[:keep], tail.values]))
+
+    def slice(self, start=None, end=None) -> PriceSeries:
+        """Périodes dont la valeur retenue tombe dans [start, end] (dichotomie)."""
+        i0 = 0 if start is None else np.searchsorted(self.src_days, to_day(start), side="left")
+        i1 = len(self.src_days) if end is None else np.searchsorted(self.src_days, to_day(end), side="right")
+        return PriceSeries(self.labels[i0:i1], self.values[i0:i1])
+
+
+# ---------- vues persistées (cache_dir/views) ----------
+_VIEWS_DIR: Path | None = None
+_VIEWS_DIR_LOCK = threading.Lock()
+
+def _views_path(kind: str, name: str, freq: str) -> Path:
+    global _VIEWS_DIR
+    with _VIEWS_DIR_LOCK:
+        if _VIEWS_DIR is None:
+            _VIEWS_DIR = Path(load_config()["cache_dir"]) / "views"
+    return ensure_dir(_VIEWS_DIR / kind) / f"{quote(name, safe='')}.{freq}.npz"
+
+
+def _load_views(path: Path) -> tuple[str, dict[str, View]] | None:
+    """(empreinte de la source, {colonne -> vue}), None si absent ou illisible."""
+    try:
+        with np.load(path) as z:
+            names = [str(n) for n in z["names"]]
+            return str(z["key"]), {n: View(z[f"l{i}"], z[f"s{i}"], z[f"v{i}"]) for i, n in enumerate(names)}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_views(path: Path, key: str, views: dict[str, View]) -> None:
+    arrays = {"key": np.array(key), "names": np.array(list(views), dtype=str)}
+    for i, v in enumerate(views.values()):
+        arrays.update({f"l{i}": v.labels, f"s{i}": v.src_days, f"v{i}": v.values})
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+# vues déjà chargées dans le process, devant le cache disque
+_VIEWS: OrderedDict[tuple, tuple[str, dict[str, View]]] = OrderedDict()
+_VIEWS_LOCK = threading.Lock()
+
+
+def _cached(key: tuple, path: Path) -> tuple[str, dict[str, View]] | None:
+    with _VIEWS_LOCK:
+        hit = _VIEWS.get(key)
+        if hit is not None:
+            _VIEWS.move_to_end(key)
+            return hit
+    return _load_views(path)
+
+
+def _remember(key: tuple, path: Path, content_hash: str, views: dict[str, View]) -> None:
+    _save_views(path, content_hash, views)
+    with _VIEWS_LOCK:
+        _VIEWS[key] = (content_hash, views)
+        _VIEWS.move_to_end(key)
+        while len(_VIEWS) > MAX_VIEWS:
+            _VIEWS.popitem(last=False)
+
+
+def _resample(prev: View | None, s: PriceSeries, freq: str) -> View:
+    return (prev.extend(s, freq) if prev is not None else None) or View.build(s, freq)
+
+
+# ---------- store ----------
+def get_view(namespace: str, symbol: str, freq: str | None = None,
+             content_hash: str | None = None) -> View:
+    """Vue `freq` de `symbol` (store `namespace`), recalculée seulement si la série a changé."""
+    freq = normalize_freq(freq)
+    store = get_store(namespace)
+    if content_hash is None and store.catalog is not None:
+        info = store.info(symbol)   # entrée absente : construite depuis les fichiers
+        content_hash = info["hash"] if info else None
+    key, path = ("store", namespace, symbol, freq), _views_path(f"store/{namespace}", symbol, freq)
+    hit = _cached(key, path)
+    prev = hit[1].get(symbol) if hit is not None else None
+    if prev is not None and content_hash is not None and hit[0] == content_hash:
+        return prev
+
+    view = _resample(prev, store.load(symbol), freq)
+    if content_hash is not None:
+        _remember(key, path, content_hash, {symbol: view})
+    return view
+
+
+def get_panel(symbols: list[str] | dict[str, str], start=None, end=None,
+              freq: str | None = None, namespace: str = "yahoo") -> pd.DataFrame:
+    """
+    Panel (date x colonne) des `symbols` du store `namespace` sur
+    [start, end], à la fréquence `freq` (dernière valeur de chaque période,
+    datée de la fin de période). `symbols` : liste, ou {colonne -> symbole}.
+    Lignes = dates où au moins une série a une valeur.
+    """
+    mapping = dict(symbols) if isinstance(symbols, dict) else {s: s for s in symbols}
+    store = get_store(namespace)
+    hashes = ({} if store.catalog is None
+              else store.catalog.hashes(store.namespace, list(dict.fromkeys(mapping.values()))))
+    cols = {
+        label: get_view(namespace, sym, freq, hashes.get(sym)).slice(start, end).rename(label)
+        for label, sym in mapping.items()
+    }
+    df = to_frame(cols, list(mapping))
+    df.index.name = "date"
+    return df
+
+
+# ---------- tableaux des collecteurs ----------
+def frame_panel(path: str | Path, columns: list[str] | None = None, start=None, end=None,
+                freq: str | None = None) -> pd.DataFrame:
+    """
+    Panel ré-échantillonné du tableau `path` (index daté trié), comme
+    `read_frame(path, columns, start, end).resample(freq).last()` sans les
+    périodes vides. Les vues sont calculées sur les lignes à partir de
+    `start` (projection + dichotomie) puis persistées : un run suivant sur
+    le même tableau ne lit que son en-tête.
+    """
+    freq = normalize_freq(freq)
+    if freq == "D":
+        return read_frame(path, columns=columns, start=start, end=end)
+    p = frame_path(path)
+    schema = read_schema(p)
+    index_name = schema.get("index")
+    names = [c["name"] for c in schema["columns"] if c["name"] != index_name] if columns is None else list(columns)
+    content_hash = schema.get("hash")
+
+    # vues sur [start, ...] : une entrée par (tableau, fréquence, début)
+    start_day = None if start is None else to_day(start)
+    where = hashlib.blake2b(str(p.resolve()).encode("utf-8"), digest_size=6).hexdigest()
+    name = f"{p.name[:-len(EXT)]}-{where}.{'all' if start_day is None else start_day}"
+    key, vpath = ("frame", name, freq), _views_path("frames", name, freq)
+    hit = _cached(key, vpath)
+    views = dict(hit[1]) if hit is not None else {}
+    fresh = hit is not None and content_hash is not None and hit[0] == content_hash
+    todo = [c for c in names if not fresh or c not in views]
+
+    if todo:
+        df = read_frame(p, columns=todo, start=start, copy=False)
+        days = df.index.to_numpy().astype("datetime64[D]").astype(np.int64)
+        for c in todo:
+            v = df[c].to_numpy(dtype=np.float64, na_value=np.nan)
+            ok = ~np.isnan(v)
+            views[c] = _resample(views.get(c), PriceSeries(days[ok], v[ok], c), freq)
+        if content_hash is not None:
+            if not fresh:   # source changée : les vues des autres colonnes sont périmées
+                views = {c: views[c] for c in todo}
+            _remember(key, vpath, content_hash, views)
+
+    out = to_frame({c: views[c].slice(start, end).rename(c) for c in names}, names)
+    out.index.name = index_name
+    return out
+
+
+def clear_views() -> None:
+    """Oublie les vues chargées dans le process (le cache disque reste)."""
+    with _VIEWS_LOCK:
+        _VIEWS.clear()
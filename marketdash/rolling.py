@@ -0,0 +1,182 @@
+"""
+Volatilité réalisée et matrice de corrélation glissantes, en flux.
+
+L'état garde les `window` derniers rendements (buffer circulaire) et les
+sommes par paire (effectifs, Σx, Σx², Σxy, observations communes seulement).
+Chaque nouvelle barre ajoute sa contribution et retire celle de la barre
+sortante : O(N²) par barre pour N instruments, sans repasser sur la
+fenêtre. Les sommes sont recalculées depuis le buffer toutes les `window`
+barres pour borner la dérive numérique.
+
+L'état est persisté entre deux runs (`cache_dir/rolling/<clé>.npz`) : un
+run ne pousse que les barres postérieures à la dernière date traitée.
+Seules les barres closes y entrent : la barre de la séance en cours
+(provisoire) est poussée sur une copie de l'état, rendue mais pas
+sauvegardée, et repoussée avec sa valeur finale au run suivant.
+"""
+from __future__ import annotations
+from pathlib import Path
+import copy, os, threading
+import numpy as np
+import pandas as pd
+
+from .config import load_config
+from .perf import PricePanel
+from .series import session_day
+from .utils import ensure_dir
+
+TRADING_DAYS = 252
+# version de l'état persisté (2 : barres closes uniquement)
+STATE_VERSION = 2
+
+
+class RollingMoments:
+    """Moments glissants par paire sur les `window` dernières barres."""
+
+    def __init__(self, labels: list[str], window: int = 63, min_periods: int = 20):
+        n = len(labels)
+        self.labels = list(labels)
+        self.window = int(window)
+        self.min_periods = int(min_periods)
+        self.buf = np.full((self.window, n), np.nan)
+        self.pos = 0
+        self.steps = 0
+        self.last_day: int | None = None  # dernier jour (epoch) poussé
+        self.C = np.zeros((n, n))
+        self.Sx = np.zeros((n, n))   # Σ x_i sur les barres où i et j sont présents
+        self.Sxx = np.zeros((n, n))
+        self.Sxy = np.zeros((n, n))
+
+    # ---------- mise à jour ----------
+    def _add(self, x: np.ndarray, sign: float) -> None:
+        v = (~np.isnan(x)).astype(np.float64)
+        x0 = np.where(v > 0, x, 0.0)
+        self.C += sign * np.outer(v, v)
+        self.Sx += sign * np.outer(x0, v)
+        self.Sxx += sign * np.outer(x0 * x0, v)
+        self.Sxy += sign * np.outer(x0, x0)
+
+    def update(self, x: np.ndarray, day: int | None = None) -> None:
+        """Pousse une barre de rendements (N,) ; NaN = pas d'observation."""
+        x = np.asarray(x, dtype=np.float64)
+        self._add(self.buf[self.pos], -1.0)  # barre sortante (NaN tant que le buffer se remplit)
+        self.buf[self.pos] = x
+        self._add(x, 1.0)
+        self.pos = (self.pos + 1) % self.window
+        self.steps += 1
+        if self.steps % self.window == 0:
+            self._rebuild()
+        if day is not None:
+            self.last_day = int(day)
+
+    def _rebuild(self) -> None:
+        V = (~np.isnan(self.buf)).astype(np.float64)
+        X = np.where(V > 0, self.buf, 0.0)
+        self.C = V.T @ V
+        self.Sx = X.T @ V
+        self.Sxx = (X * X).T @ V
+        self.Sxy = X.T @ X
+
+    def feed(self, days: np.ndarray, returns: np.ndarray) -> int:
+        """Pousse les lignes de `returns` (T x N) postérieures à `last_day` ; renvoie leur nombre."""
+        start = 0 if self.last_day is None else int(np.searchsorted(days, self.last_day, side="right"))
+        for t in range(start, len(days)):
+            self.update(returns[t], days[t])
+        return len(days) - start
+
+    def copy(self) -> "RollingMoments":
+        return copy.deepcopy(self)
+
+    # ---------- lecture ----------
+    def _pair_var(self) -> tuple[np.ndarray, np.ndarray]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (self.Sxy - self.Sx * self.Sx.T / self.C) / (self.C - 1)
+            var = (self.Sxx - self.Sx ** 2 / self.C) / (self.C - 1)  # var de i sur les barres communes à (i, j)
+        bad = self.C < self.min_periods
+        cov[bad] = np.nan
+        var[bad] = np.nan
+        return cov, var
+
+    def vol(self, annualize: int = TRADING_DAYS) -> pd.Series:
+        """Volatilité réalisée annualisée (%) de chaque instrument."""
+        _, var = self._pair_var()
+        return pd.Series(np.sqrt(np.clip(np.diag(var), 0, None) * annualize) * 100.0, index=self.labels)
+
+    def corr(self) -> pd.DataFrame:
+        cov, var = self._pair_var()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = cov / np.sqrt(var * var.T)
+        np.fill_diagonal(c, np.where(np.isnan(np.diag(var)), np.nan, 1.0))
+        return pd.DataFrame(np.clip(c, -1.0, 1.0), index=self.labels, columns=self.labels)
+
+    # ---------- persistance ----------
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp.open("wb") as f:
+            np.savez(
+                f, version=STATE_VERSION, labels=np.array(self.labels, dtype=str), window=self.window,
+                min_periods=self.min_periods, buf=self.buf, pos=self.pos, steps=self.steps,
+                last_day=-1 if self.last_day is None else self.last_day,
+                C=self.C, Sx=self.Sx, Sxx=self.Sxx, Sxy=self.Sxy,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path, labels: list[str], window: int,
+             min_periods: int = 20) -> "RollingMoments | None":
+        """État persisté, ou None s'il manque / ne correspond pas (version, univers, fenêtre)."""
+        try:
+            with np.load(path) as z:
+                if ("version" not in z.files or int(z["version"]) != STATE_VERSION
+                        or list(z["labels"]) != list(labels) or int(z["window"]) != int(window)):
+                    return None
+                st = cls(labels, window, min_periods)
+                st.buf, st.pos, st.steps = z["buf"], int(z["pos"]), int(z["steps"])
+                st.last_day = None if int(z["last_day"]) < 0 else int(z["last_day"])
+                st.C, st.Sx, st.Sxx, st.Sxy = z["C"], z["Sx"], z["Sxx"], z["Sxy"]
+                return st
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def log_returns(px: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rendements log journaliers (jours ouvrés) : (jours epoch (T,), rendements (T x N)).
+    NaN les jours sans cotation ; après un trou, le rendement couvre tout l'écart.
+    """
+    pp = PricePanel.from_frame(px, business_days=True)
+    F = pp.ffilled
+    days = pp.dates.astype("datetime64[D]").astype(np.int64)
+    if len(days) < 2:
+        return days[:0], np.empty((0, F.shape[1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.log(F[1:] / F[:-1])
+    r[np.isnan(pp.values[1:]) | ~np.isfinite(r)] = np.nan
+    return days[1:], r
+
+
+def rolling_stats(px: pd.DataFrame, key: str, window: int = 63,
+                  min_periods: int = 20, today=None) -> RollingMoments:
+    """
+    Met à jour l'état persistant `key` avec les barres closes de `px`
+    (date x instrument, barres antérieures à `today`, défaut : maintenant)
+    et renvoie l'état, barres du jour comprises. Univers ou fenêtre
+    changés -> état reconstruit depuis `px`.
+    """
+    path = ensure_dir(Path(load_config()["cache_dir"]) / "rolling") / f"{key}.npz"
+    px = px[sorted(px.columns, key=str)]  # ordre canonique : l'état reste valide d'un run à l'autre
+    labels = [str(c) for c in px.columns]
+    st = RollingMoments.load(path, labels, window, min_periods) or RollingMoments(labels, window, min_periods)
+    days, r = log_returns(px)
+    if st.last_day is not None and len(days) and days[0] > st.last_day:
+        # trou entre l'état et `px` : les barres manquantes sont inconnues, on repart de zéro
+        st = RollingMoments(labels, window, min_periods)
+    cut = int(np.searchsorted(days, session_day(today), side="left"))
+    if st.feed(days[:cut], r[:cut]):
+        st.save(path)
+    if cut < len(days):
+        # barre provisoire : dans le résultat, jamais dans l'état persisté
+        st = st.copy()
+        st.feed(days[cut:], r[cut:])
+    return st
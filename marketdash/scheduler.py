@@ -0,0 +1,98 @@
+"""
+Ordonnanceur de fetchs : pool de threads borné + limite de débit par hôte.
+
+Chaque tâche est soumise avec l'hôte qu'elle va appeler ; avant de
+s'exécuter, elle prend un jeton dans le seau (token bucket) de cet hôte.
+Les appels FRED / TE / Yahoo se chevauchent donc sans dépasser le débit
+autorisé par chaque API.
+
+    with FetchScheduler.from_config() as sched:
+        fut = sched.submit(FRED_HOST, fred_history, "DGS10", "2010-01-01", key)
+        s = fut.result()
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+import threading, time
+
+from .config import load_config
+
+# débit par défaut (requêtes/seconde, rafale) si l'hôte n'est pas configuré
+DEFAULT_RATE = (5.0, 5)
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `rate` jetons/s, au plus `burst` en réserve."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Bloque jusqu'à obtenir un jeton."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchScheduler:
+    """Pool de `max_workers` threads ; un TokenBucket par hôte."""
+
+    def __init__(self, max_workers: int = 8,
+                 rate_limits: dict[str, tuple[float, int]] | None = None):
+        self.max_workers = max(1, int(max_workers))
+        self.rate_limits = {h: (float(r[0]), int(r[1])) for h, r in (rate_limits or {}).items()}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch")
+
+    @classmethod
+    def from_config(cls, cfg: dict | None = None) -> "FetchScheduler":
+        """Construit l'ordonnanceur depuis la section `fetch` de config.yaml."""
+        cfg = cfg if cfg is not None else load_config()
+        fetch = cfg.get("fetch") or {}
+        return cls(
+            max_workers=fetch.get("max_workers", 8),
+            rate_limits=fetch.get("rate_limits") or {},
+        )
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                rate, burst = self.rate_limits.get(host, DEFAULT_RATE)
+                b = self._buckets[host] = TokenBucket(rate, burst)
+            return b
+
+    def submit(self, host: str, fn: Callable, *args, **kwargs) -> Future:
+        """Exécute `fn(*args, **kwargs)` dans le pool, après un jeton de `host`."""
+        bucket = self.bucket(host)
+
+        def task():
+            bucket.acquire()
+            return fn(*args, **kwargs)
+
+        return self._pool.submit(task)
+
+    def map(self, host: str, fn: Callable, items: dict, **kwargs) -> dict[str, Future]:
+        """Soumet `fn(item, **kwargs)` pour chaque valeur de `items` -> {clé: Future}."""
+        return {k: self.submit(host, fn, v, **kwargs) for k, v in items.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "FetchScheduler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,245 @@
+"""
+Série de prix compacte, portée par deux tableaux numpy :
+- `days`   : int64, jours depuis 1970-01-01, triés et uniques
+- `values` : float64, sans NaN
+
+C'est le format interne des providers, du store et du memo : la
+normalisation (tz, tri, float, dropna, doublons) est faite une seule fois
+à l'entrée, les découpages sont des vues (pas de copie) et la conversion
+en pandas n'a lieu qu'en bout de chaîne (`to_pandas`).
+
+Les tableaux sont partagés (memo, store, vues) : ne jamais les modifier
+en place, toute opération renvoie une nouvelle série.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+_EMPTY_DAYS = np.empty(0, dtype=np.int64)
+_EMPTY_VALUES = np.empty(0, dtype=np.float64)
+
+# écart relatif au-delà duquel une barre re-téléchargée est un ajustement
+RESTATE_RTOL = 1e-6
+
+
+def to_day(d) -> int:
+    """Date (str / datetime / Timestamp / datetime64) -> jour epoch."""
+    ts = pd.Timestamp(d)
+    if ts.tz is not None:
+        ts = ts.tz_convert(None)
+    return int(ts.value // 86_400_000_000_000)
+
+
+def session_day(now=None) -> int:
+    """Jour (epoch) de la séance en cours : ses barres bougent encore (barres provisoires)."""
+    return to_day(pd.Timestamp(now) if now is not None else pd.Timestamp.now())
+
+
+def weekday(days: np.ndarray) -> np.ndarray:
+    """Jour de semaine (lundi=0) de jours epoch (le 01/01/1970 est un jeudi)."""
+    return (days + 3) % 7
+
+
+class PriceSeries:
+    """Série journalière (dates -> float64) adossée à deux tableaux."""
+    __slots__ = ("days", "values", "name")
+
+    def __init__(self, days: np.ndarray, values: np.ndarray, name: str | None = None):
+        # pas de contrôle ici : les constructeurs garantissent tri / unicité / pas de NaN
+        self.days = days
+        self.values = values
+        self.name = name
+
+    # ---------- construction ----------
+    @classmethod
+    def empty(cls, name: str | None = None) -> "PriceSeries":
+        return cls(_EMPTY_DAYS, _EMPTY_VALUES, name)
+
+    @classmethod
+    def from_arrays(cls, dates, values, name: str | None = None) -> "PriceSeries":
+        """
+        Dates (datetime64 / chaînes / int64 jours) + valeurs -> série normalisée :
+        NaN / NaT retirés, tri stable, doublons -> dernière valeur.
+        """
+        d = np.asarray(dates)
+        if d.dtype.kind in "iu":
+            days = d.astype(np.int64, copy=False)
+            ok = np.ones(len(days), dtype=bool)
+        else:
+            if d.dtype.kind != "M":
+                d = pd.to_datetime(d, errors="coerce").values
+            ok = ~np.isnat(d)
+            days = d.astype("datetime64[D]").astype(np.int64)
+        v = np.asarray(values, dtype=np.float64)
+        ok &= ~np.isnan(v)
+        if not ok.all():
+            days, v = days[ok], v[ok]
+        if len(days) > 1 and not (np.diff(days) > 0).all():
+            order = np.argsort(days, kind="stable")
+            days, v = days[order], v[order]
+            keep = np.append(days[1:] != days[:-1], True)  # dernière occurrence
+            days, v = days[keep], v[keep]
+        return cls(days, v, name)
+
+    @classmethod
+    def from_pandas(cls, x, name: str | None = None) -> "PriceSeries":
+        """
+        Series / DataFrame / array -> PriceSeries (cf. `_coerce_to_series`) :
+        DataFrame -> 'Adj Close' si dispo sinon 1ère colonne, tz retirée
+        (conversion UTC), index non datable -> lignes ignorées.
+        """
+        if isinstance(x, PriceSeries):
+            return x
+        if isinstance(x, pd.DataFrame):
+            if x.shape[1] != 1 and "Adj Close" in x.columns:
+                x = x["Adj Close"]
+            if isinstance(x, pd.DataFrame):
+                x = x.iloc[:, 0]
+        if not isinstance(x, pd.Series):
+            try:
+                arr = np.squeeze(np.asarray(x))
+                x = pd.Series(arr)
+            except Exception as e:
+                raise ValueError(f"[{name}] Impossible de convertir en Series: {type(x)} - {e}")
+
+        idx = x.index
+        if not isinstance(idx, pd.DatetimeIndex):
+            idx = pd.to_datetime(idx, errors="coerce", utc=True)
+        if idx.tz is not None:
+            idx = idx.tz_convert(None)
+        values = pd.to_numeric(x, errors="coerce") if x.dtype == object else x
+        return cls.from_arrays(idx.values, values.to_numpy(dtype=np.float64, na_value=np.nan),
+                               name if name is not None else x.name)
+
+    # ---------- accès ----------
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.days) == 0
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Dates en datetime64[ns] (nouveau tableau)."""
+        return self.days.astype("datetime64[D]").astype("datetime64[ns]")
+
+    @property
+    def nbytes(self) -> int:
+        return self.days.nbytes + self.values.nbytes
+
+    def first_day(self) -> int | None:
+        return int(self.days[0]) if len(self.days) else None
+
+    def last_day(self) -> int | None:
+        return int(self.days[-1]) if len(self.days) else None
+
+    def last_date(self) -> pd.Timestamp | None:
+        return None if not len(self.days) else pd.Timestamp(np.datetime64(int(self.days[-1]), "D"))
+
+    def slice(self, start=None, end=None) -> "PriceSeries":
+        """Vue sur [start, end] (bornes incluses, None = ouvert), sans copie."""
+        i0 = 0 if start is None else np.searchsorted(self.days, to_day(start), side="left")
+        i1 = len(self.days) if end is None else np.searchsorted(self.days, to_day(end), side="right")
+        return PriceSeries(self.days[i0:i1], self.values[i0:i1], self.name)
+
+    def merge(self, new: "PriceSeries") -> "PriceSeries":
+        """Union des deux séries ; `new` écrase les dates communes."""
+        if not len(new.days):
+            return self
+        if not len(self.days):
+            return PriceSeries(new.days, new.values, self.name or new.name)
+        # cas courant (queue de série) : `new` couvre toute la fin de l'ancien
+        cut = int(np.searchsorted(self.days, new.days[0], side="left"))
+        tail = self.days[cut:]
+        if len(tail) <= len(new.days) and np.isin(tail, new.days, assume_unique=True).all():
+            return PriceSeries(np.concatenate([self.days[:cut], new.days]),
+                               np.concatenate([self.values[:cut], new.values]),
+                               self.name or new.name)
+        keep = ~np.isin(self.days, new.days, assume_unique=True)
+        days = np.concatenate([self.days[keep], new.days])
+        values = np.concatenate([self.values[keep], new.values])
+        order = np.argsort(days, kind="stable")
+        return PriceSeries(days[order], values[order], self.name or new.name)
+
+    def scale(self, factor: float) -> "PriceSeries":
+        """Série multipliée par `factor` (une multiplication sur le tableau)."""
+        return PriceSeries(self.days, self.values * float(factor), self.name)
+
+    def restatement(self, new: "PriceSeries", rtol: float = RESTATE_RTOL) -> float | None:
+        """
+        Facteur d'ajustement rétroactif (dividende, split) entre la série
+        stockée et `new` : rapport new / self, s'il est le même (à `rtol`
+        près) sur toutes les barres communes et différent de 1 ; sinon None
+        (barres identiques, ou correction ponctuelle : la fusion n'écrase
+        alors que les barres qui diffèrent). La dernière barre de `self`
+        (éventuellement intraday) n'est pas un témoin fiable ; il faut au
+        moins deux barres communes avant elle.
+        """
+        if not len(self.days) or not len(new.days):
+            return None
+        common = np.intersect1d(self.days[:-1], new.days, assume_unique=True)
+        if len(common) < 2:
+            return None
+        old = self.values[np.searchsorted(self.days, common)]
+        cur = new.values[np.searchsorted(new.days, common)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratios = cur / old
+        if not np.isfinite(ratios).all():
+            return None
+        f = float(np.median(ratios))
+        if abs(f - 1.0) <= rtol or (np.abs(ratios / f - 1.0) > rtol).any():
+            return None
+        return f
+
+    def rename(self, name: str | None) -> "PriceSeries":
+        return PriceSeries(self.days, self.values, name)
+
+    # ---------- pandas (bords) ----------
+    def to_pandas(self) -> pd.Series:
+        # copie des valeurs : la Series rendue appartient à l'appelant
+        return pd.Series(self.values.copy(), index=pd.DatetimeIndex(self.dates), name=self.name)
+
+    def __repr__(self) -> str:
+        if not len(self.days):
+            return f"PriceSeries({self.name!r}, vide)"
+        first = np.datetime64(int(self.days[0]), "D")
+        last = np.datetime64(int(self.days[-1]), "D")
+        return f"PriceSeries({self.name!r}, {len(self.days)} pts, {first} -> {last})"
+
+
+def as_price_series(x, name: str | None = None) -> PriceSeries:
+    """PriceSeries telle quelle, sinon conversion depuis pandas / array."""
+    return x if isinstance(x, PriceSeries) else PriceSeries.from_pandas(x, name)
+
+
+def align(series: list[PriceSeries], days: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Aligne des séries sur un calendrier commun en une passe :
+    renvoie (jours (T,), valeurs (T x N) NaN là où une série n'a rien).
+    Par défaut, le calendrier est l'union des dates ; sinon les points
+    hors de `days` sont ignorés.
+    """
+    lens = np.fromiter((len(s.days) for s in series), dtype=np.int64, count=len(series))
+    all_days = np.concatenate([s.days for s in series]) if series else _EMPTY_DAYS
+    all_vals = np.concatenate([s.values for s in series]) if series else _EMPTY_VALUES
+    cols = np.repeat(np.arange(len(series)), lens)
+    if days is None:
+        days = np.unique(all_days)
+        pos = np.searchsorted(days, all_days)
+    else:
+        pos = np.searchsorted(days, all_days)
+        ok = pos < len(days)
+        ok[ok] = days[pos[ok]] == all_days[ok]
+        pos, cols, all_vals = pos[ok], cols[ok], all_vals[ok]
+    out = np.full((len(days), len(series)), np.nan)
+    out[pos, cols] = all_vals
+    return days, out
+
+
+def to_frame(series: dict[str, PriceSeries], columns: list[str] | None = None) -> pd.DataFrame:
+    """{label -> PriceSeries} -> DataFrame (date x label), sans passer par des Series."""
+    columns = list(series) if columns is None else columns
+    days, values = align([series[c] if c in series else PriceSeries.empty(c) for c in columns])
+    index = pd.DatetimeIndex(days.astype("datetime64[D]").astype("datetime64[ns]"))
+    return pd.DataFrame(values, index=index, columns=columns)
@@ -0,0 +1,281 @@
+"""
+Stockage local des séries téléchargées (une série par symbole).
+
+Chaque provider a son espace de noms sous `cache_dir/store/<namespace>/` :
+- `<symbole>.ts`   : série compressée (cf. marketdash.codec)
+- `<symbole>.json` : méta (début couvert, dernier fetch, etc.)
+Un ancien `<symbole>.csv` (date,value) est encore lu, puis remplacé à la
+prochaine écriture ; un store écrit avant la correction des noms de
+fichiers ('EXV1.DE' -> 'EXV1.csv') est purgé une fois à l'ouverture
+(`migrate_layout`). Chaque écriture met aussi à jour le catalogue
+(cf. marketdash.catalog) : la planification des fetchs le consulte au
+lieu d'ouvrir les fichiers.
+
+Les providers lisent d'abord le store puis ne demandent au réseau
+que la plage manquante (queue de série). En interne, les séries
+circulent en `PriceSeries` (cf. marketdash.series).
+"""
+from __future__ import annotations
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote, unquote
+import json, os, threading, time
+import numpy as np
+import pandas as pd
+
+from .catalog import TAIL_DAYS, SeriesCatalog, get_catalog
+from .codec import HEAD_SIZE, decode, encode, peek
+from .config import load_config
+from .series import PriceSeries, as_price_series
+from .utils import ensure_dir
+
+# nommage des fichiers (2 : nom complet du symbole, cf. SeriesStore.migrate_layout)
+LAYOUT_VERSION = 2
+
+
+class SeriesStore:
+    """Store fichier (1 bloc compressé + 1 JSON de méta par symbole)."""
+
+    def __init__(self, root: str | Path, namespace: str, catalog: SeriesCatalog | None = None):
+        self.namespace = namespace
+        self.root = ensure_dir(Path(root) / namespace)
+        self.catalog = catalog
+
+    # ---------- chemins ----------
+    def _stem(self, symbol: str) -> str:
+        # '^GSPC', 'EURUSD=X'... -> nom de fichier sûr
+        return quote(symbol, safe="")
+
+    def _data_path(self, symbol: str) -> Path:
+        # pas de with_suffix : 'EXV1.DE' et 'EXV1.PA' donneraient le même fichier
+        return self.root / f"{self._stem(symbol)}.ts"
+
+    def _legacy_path(self, symbol: str) -> Path:
+        return self.root / f"{self._stem(symbol)}.csv"
+
+    def _meta_path(self, symbol: str) -> Path:
+        return self.root / f"{self._stem(symbol)}.json"
+
+    # ---------- lecture ----------
+    def load(self, symbol: str) -> PriceSeries:
+        """Série stockée (vide si absente ou illisible)."""
+        try:
+            days, values = decode(self._data_path(symbol).read_bytes())
+            return PriceSeries(days, values, symbol)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            # bloc illisible : le catalogue ne doit plus en garantir la couverture
+            if self.catalog is not None:
+                self.catalog.forget(self.namespace, symbol)
+            return PriceSeries.empty(symbol)
+        p = self._legacy_path(symbol)
+        if not p.exists():
+            return PriceSeries.empty(symbol)
+        try:
+            df = pd.read_csv(p, dtype={"value": np.float64})
+        except Exception:
+            return PriceSeries.empty(symbol)
+        if df.empty or df.shape[1] < 2:
+            return PriceSeries.empty(symbol)
+        dates = pd.to_datetime(df.iloc[:, 0], errors="coerce", format="ISO8601").values
+        return PriceSeries.from_arrays(dates, df.iloc[:, 1].to_numpy(dtype=np.float64), symbol)
+
+    def symbols(self) -> list[str]:
+        """Symboles présents sur disque (lecture du répertoire)."""
+        names = {unquote(p.name[:-len(p.suffix)]) for p in self.root.iterdir()
+                 if p.suffix in (".ts", ".csv") and not p.name.startswith(".")}
+        return sorted(names)
+
+    def read(self, symbol: str) -> pd.Series:
+        """Comme `load`, converti en Series pandas."""
+        return self.load(symbol).to_pandas()
+
+    def meta(self, symbol: str) -> dict:
+        p = self._meta_path(symbol)
+        if not p.exists():
+            return {}
+        try:
+            with p.open("r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    # ---------- écriture ----------
+    def write(self, symbol: str, s: PriceSeries | pd.Series, **meta) -> None:
+        s = as_price_series(s, symbol)
+        _atomic_write(self._data_path(symbol), encode(s.days, s.values))
+        self._legacy_path(symbol).unlink(missing_ok=True)
+        m = {**self.meta(symbol), **meta}
+        _atomic_write(self._meta_path(symbol), json.dumps(m, indent=1, default=str))
+        if self.catalog is not None:
+            self.catalog.record(self.namespace, symbol, s, m)
+
+    def info(self, symbol: str) -> dict | None:
+        """
+        Entrée de catalogue de `symbol` (first_day, last_day, rows, tail_days,
+        covered_from, fetched_*...), None si rien n'est stocké. Sans entrée
+        (store rempli avant le catalogue), elle est construite depuis les
+        fichiers puis enregistrée.
+        """
+        if self.catalog is not None:
+            hit = self.catalog.get(self.namespace, symbol)
+            if hit is not None:
+                return hit
+        s = self.load(symbol)
+        if not len(s) and not self._meta_path(symbol).exists():
+            return None
+        m = self.meta(symbol)
+        if self.catalog is not None:
+            self.catalog.record(self.namespace, symbol, s, m)
+            return self.catalog.get(self.namespace, symbol)
+        return {**m, "first_day": s.first_day(), "last_day": s.last_day(), "rows": len(s),
+                "tail_days": [int(d) for d in s.days[-TAIL_DAYS:]]}
+
+    def merge(self, symbol: str, new: PriceSeries | pd.Series | None,
+              restate: bool = False, **meta) -> PriceSeries:
+        """
+        Fusionne `new` dans la série stockée (les nouvelles valeurs
+        écrasent les anciennes sur les dates communes) et persiste.
+        Avec `restate`, un même écart relatif sur toutes les barres communes
+        (Adj Close recalculé après dividende / split) est reporté sur tout
+        l'historique stocké par une seule multiplication ; un écart isolé
+        n'écrase que les barres concernées.
+        """
+        merged = self.load(symbol)
+        if new is not None:
+            new = as_price_series(new, symbol)
+            factor = merged.restatement(new) if restate else None
+            if factor is not None:
+                merged = merged.scale(factor)
+                meta = {**meta, "restated_at": time.time(), "restate_factor": factor}
+            merged = merged.merge(new)
+        self.write(symbol, merged, **meta)
+        return merged.rename(symbol)
+
+    def migrate_legacy(self) -> int:
+        """Réécrit au format compressé les anciens `<symbole>.csv` ; renvoie leur nombre."""
+        n = 0
+        for p in self.root.glob("*.csv"):
+            symbol = unquote(p.name[:-len(".csv")])
+            s = self.load(symbol)
+            if len(s) or not self._data_path(symbol).exists():
+                self.write(symbol, s)
+                n += 1
+        return n
+
+    def migrate_layout(self) -> int:
+        """
+        Migration unique des stores écrits avant la correction des noms de
+        fichiers : `with_suffix` coupait le suffixe de place ('EXV1.DE' et
+        'EXV1.PA' -> 'EXV1.csv'). Le symbole d'un fichier tronqué ne se
+        déduit pas de son nom : les fichiers antérieurs sont supprimés (les
+        séries sont re-téléchargées au prochain fetch) et le catalogue est
+        reconstruit. Sans effet une fois le marqueur `.layout` posé ;
+        renvoie le nombre de séries supprimées.
+        """
+        marker = self.root / ".layout"
+        try:
+            if int(marker.read_text(encoding="utf-8")) >= LAYOUT_VERSION:
+                return 0
+        except (OSError, ValueError):
+            pass
+        n = 0
+        for p in self.root.iterdir():
+            if p.suffix in (".ts", ".csv", ".json") and not p.name.startswith("."):
+                n += p.suffix != ".json"
+                p.unlink(missing_ok=True)
+        if self.catalog is not None:
+            self.catalog.rebuild(self)
+        _atomic_write(marker, str(LAYOUT_VERSION))
+        return n
+
+    # ---------- fetch incrémental ----------
+    def _intact(self, symbol: str, rows: int) -> bool:
+        """Le bloc stocké a l'en-tête et la taille attendus pour `rows` points (sans le décoder)."""
+        try:
+            with self._data_path(symbol).open("rb") as f:
+                n, size = peek(f.read(HEAD_SIZE))
+                return n == rows and size == os.fstat(f.fileno()).st_size
+        except (OSError, ValueError):
+            return False
+
+    def plan_fetch(self, symbol: str, start: datetime, end: datetime,
+                   overlap: int = 1) -> tuple[pd.Timestamp | None, str]:
+        """
+        Plage à demander au réseau pour couvrir [start, end] :
+        renvoie (début du fetch ou None si le store suffit, covered_from à enregistrer).
+        Les `overlap` dernières barres stockées sont re-demandées (la
+        dernière a pu bouger ; les autres servent de témoins d'ajustement).
+        Un bloc absent ou abîmé (en-tête en désaccord avec le catalogue)
+        redemande toute la plage.
+        """
+        start_day = pd.Timestamp(start).normalize()
+        info = self.info(symbol) or {}
+        covered = info.get("covered_from")
+        if covered and pd.Timestamp(covered) <= start_day:
+            tail = info.get("tail_days") or []
+            if tail and self._intact(symbol, int(info.get("rows") or 0)):
+                if is_fresh(info, end):
+                    return None, covered
+                d = int(tail[-min(max(int(overlap), 1), len(tail))])
+                return max(start_day, pd.Timestamp(np.datetime64(d, "D"))), covered
+        return start_day, start_day.strftime("%Y-%m-%d")
+
+    def record_fetch(self, symbol: str, new: PriceSeries | pd.Series | None, covered: str,
+                     end: datetime, restate: bool = False) -> PriceSeries:
+        """Fusionne le résultat d'un fetch et note sa couverture / son heure."""
+        return self.merge(
+            symbol, new, restate=restate,
+            covered_from=covered,
+            fetched_through=pd.Timestamp(end).strftime("%Y-%m-%d"),
+            fetched_at=time.time(),
+        )
+
+
+def _atomic_write(path: Path, data: str | bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    if isinstance(data, bytes):
+        tmp.write_bytes(data)
+    else:
+        tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# ---------- stores par défaut (un par provider) ----------
+_STORES: dict[str, SeriesStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def get_store(namespace: str) -> SeriesStore:
+    """Store `namespace` sous `cache_dir/store` (config.yaml)."""
+    with _STORES_LOCK:
+        st = _STORES.get(namespace)
+        if st is None:
+            cfg = load_config()
+            st = SeriesStore(Path(cfg["cache_dir"]) / "store", namespace, catalog=get_catalog())
+            st.migrate_layout()
+            _STORES[namespace] = st
+        return st
+
+
+def fresh_seconds() -> float:
+    """Durée pendant laquelle un fetch récent est réutilisé tel quel."""
+    cfg = load_config()
+    return float(cfg.get("store_fresh_minutes", 15)) * 60.0
+
+
+def is_fresh(meta: dict, end: datetime) -> bool:
+    """
+    True si le store couvre déjà `end` sans refetch :
+    - `end` est antérieur au jour du dernier fetch (barres définitives), ou
+    - le dernier fetch date de moins de `store_fresh_minutes`.
+    """
+    fetched_at = meta.get("fetched_at")
+    through = meta.get("fetched_through")
+    if not fetched_at or not through:
+        return False
+    end_day = pd.Timestamp(end).normalize()
+    if pd.Timestamp(through) < end_day:
+        return False
+    fetched_day = pd.Timestamp(datetime.fromtimestamp(fetched_at)).normalize()
+    return end_day < fetched_day or (time.time() - fetched_at) < fresh_seconds()
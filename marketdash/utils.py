@@ -26,124 +26,59 @@ def load_yaml(path: str | Path) -> dict:
 
 
 # ---------- Perf calculations ----------
-def _pct(a: float, b: float) -> float:
-    if pd.isna(a) or pd.isna(b) or b == 0:
-        return np.nan
-    return (a / b - 1.0) * 100.0
-
-
 def _coerce_to_series(x, label: str) -> pd.Series:
     """
     Convertit x en Series 1D horodatée, de façon robuste :
     - DataFrame 1 colonne -> colonne unique
     - DataFrame multi-colonnes -> 'Adj Close' si dispo, sinon 1ère colonne
     - ndarray/list -> Series
-    - Series -> inchangée
-    Nettoie aussi l'index (to_datetime, drop tz).
+    - Series / PriceSeries -> inchangée
+    Nettoie aussi l'index (to_datetime, drop tz), trie et retire les NaN
+    (une seule passe, via PriceSeries).
     """
-    # DataFrame
-    if isinstance(x, pd.DataFrame):
-        if x.shape[1] == 1:
-            s = x.iloc[:, 0]
-        else:
-            if "Adj Close" in x.columns:
-                s = x["Adj Close"]
-            else:
-                s = x.iloc[:, 0]
-    # Series
-    elif isinstance(x, pd.Series):
-        s = x
-    # Numpy / list-like
-    else:
-        try:
-            arr = np.asarray(x)
-            # squeeze pour éliminer (n,1)
-            arr = np.squeeze(arr)
-            s = pd.Series(arr)
-        except Exception as e:
-            raise ValueError(f"[{label}] Impossible de convertir en Series: {type(x)} - {e}")
-
-    # Assainir index temporel
-    if not isinstance(s.index, pd.DatetimeIndex):
-        idx = pd.to_datetime(s.index, errors="coerce", utc=True)
-    else:
-        idx = s.index
-
-    # drop NA d’index
-    mask_valid = ~pd.isna(idx)
-    s = pd.Series(s.values[mask_valid], index=idx[mask_valid])
-
-    # retirer timezone si présente
-    try:
-        if getattr(s.index, "tz", None) is not None:
-            s.index = s.index.tz_convert(None)
-    except Exception:
-        # si tz_localize/convert plante, on tente tz_localize(None)
-        try:
-            s.index = s.index.tz_localize(None)
-        except Exception:
-            pass
-
-    # tri + dropna valeurs
-    s = s.sort_index().astype(float).dropna()
-    return s
+    from .series import as_price_series
+    return as_price_series(x, label).to_pandas()
 
 
 def compute_perf_table(series_map: dict[str, pd.Series | pd.DataFrame | np.ndarray | list],
-                       universe_name: str) -> pd.DataFrame:
+                       universe_name: str, base_currency: str | None = None,
+                       currencies: dict[str, str | None] | None = None) -> pd.DataFrame:
     """
     Input: dict {label -> Series(prices) OU DataFrame(1 col) OU array}.
     Output: DataFrame colonnes:
       universe, sector, level, perf_5d, perf_1m, perf_3m, perf_ytd
-    """
-    today = last_business_day(datetime.now())
-    rows = []
-
-    for label, obj in series_map.items():
-        try:
-            s = _coerce_to_series(obj, label)
-        except Exception:
-            # on logge une ligne vide pour garder la table complète
-            rows.append([universe_name, label, np.nan, np.nan, np.nan, np.nan, np.nan])
-            continue
-
-        if s.empty:
-            rows.append([universe_name, label, np.nan, np.nan, np.nan, np.nan, np.nan])
-            continue
 
-        # Fréquence business + ffill
-        s = s.asfreq("B").ffill()
-
-        level = float(s.iloc[-1])
-
-        # Jours ouvrés relatifs
-        d5  = s.index[-1] - pd.tseries.offsets.BDay(5)
-        d21 = s.index[-1] - pd.tseries.offsets.BDay(21)
-        d63 = s.index[-1] - pd.tseries.offsets.BDay(63)
-        # close Y-1 (au plus proche <= 31/12)
-        y0  = pd.Timestamp(year=today.year - 1, month=12, day=31)
-
-        def val_at(idx_like):
-            try:
-                # prend la dernière valeur <= idx_like
-                return float(s.loc[:idx_like].iloc[-1])
-            except Exception:
-                return np.nan
+    Calcul vectorisé sur le panel aligné (cf. marketdash.perf).
+    `base_currency` + `currencies` ({label -> devise}) : perfs converties
+    dans cette devise (cf. marketdash.fx), `level` en devise locale.
+    """
+    from .perf import perf_table
+    return perf_table(series_map, universe_name, today=last_business_day(datetime.now()),
+                      base_currency=base_currency, currencies=currencies)
 
-        p5  = val_at(d5)
-        p21 = val_at(d21)
-        p63 = val_at(d63)
-        py0 = val_at(y0)
 
-        perf_5d  = _pct(level, p5)
-        perf_1m  = _pct(level, p21)
-        perf_3m  = _pct(level, p63)
-        perf_ytd = _pct(level, py0)
+def compute_perf_table_chunked(symbols: dict[str, str], universe_name: str, load=None,
+                               memory_mb: float | None = None, base_currency: str | None = None,
+                               currencies: dict[str, str | None] | None = None) -> pd.DataFrame:
+    """
+    Comme `compute_perf_table` pour un univers {label -> symbole} trop gros
+    pour la mémoire : symboles chargés et calculés par blocs (cf.
+    marketdash.perf.perf_table_chunked), pic mémoire ~ `memory_mb`.
+    """
+    from .perf import perf_table_chunked
+    return perf_table_chunked(symbols, universe_name, load=load,
+                              today=last_business_day(datetime.now()), memory_mb=memory_mb,
+                              base_currency=base_currency, currencies=currencies)
 
-        rows.append([universe_name, label, level, perf_5d, perf_1m, perf_3m, perf_ytd])
 
-    df = pd.DataFrame(
-        rows,
-        columns=["universe", "sector", "level", "perf_5d", "perf_1m", "perf_3m", "perf_ytd"]
-    )
-    return df
+def compute_perf_history(series_map: dict[str, pd.Series | pd.DataFrame | np.ndarray | list],
+                         universe_name: str, long: bool = True, base_currency: str | None = None,
+                         currencies: dict[str, str | None] | None = None) -> pd.DataFrame:
+    """
+    Perfs 5D / 1M / 3M / YTD à chaque date de l'historique (backfill en une
+    passe, cf. marketdash.perf.perf_history). Format long par défaut :
+      universe, date, sector, level, perf_5d, perf_1m, perf_3m, perf_ytd
+    """
+    from .perf import perf_history
+    return perf_history(series_map, universe_name, long=long,
+                        base_currency=base_currency, currencies=currencies)
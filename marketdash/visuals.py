@@ -5,6 +5,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 
+from .frames import read_frame
+
 COLOR_HEADER = "#0A3D6E"
 COLOR_HDRROW = "#0A3D6E"
 COLOR_CELL_A = "#EEF1F5"
@@ -75,7 +77,10 @@ def _draw_panel(ax, title, rows, x, y, sec_w):
     return sec_h + 10
 
 def plot_sector_panels(df_or_path, output="output/sectors_2panels_legacy_style.png"):
-    df = pd.read_csv(df_or_path) if isinstance(df_or_path, (str, Path)) else df_or_path.copy()
+    if isinstance(df_or_path, (str, Path)):
+        df = pd.read_csv(df_or_path) if str(df_or_path).endswith(".csv") else read_frame(df_or_path)
+    else:
+        df = df_or_path.copy()
     df = df.fillna(np.nan)
 
     left = df[df["universe"]=="SP 500"].reset_index(drop=True)
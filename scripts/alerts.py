@@ -0,0 +1,50 @@
+"""
+Évalue les règles d'alerte (config.yaml : alerts) sur les nouvelles observations du store.
+
+Sortie : data/alerts.json (journal compact des dernières alertes)
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import argparse
+import time
+
+from marketdash.alerts import AlertEngine, append_log
+from marketdash.utils import ensure_dir
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = ensure_dir(ROOT / "data")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument(
+        "--reset", action="store_true",
+        help="oublie l'état des règles (ré-amorçage sur l'historique, sans alerte)",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    engine = AlertEngine.from_config()
+    if not engine.rules:
+        print("ℹ️ Aucune règle d'alerte (config.yaml : alerts.rules)")
+        return
+    if args.reset:
+        engine.reset()
+
+    t0 = time.perf_counter()
+    alerts = engine.run()
+    dt = (time.perf_counter() - t0) * 1000
+
+    out_path = DATA_DIR / "alerts.json"
+    append_log(out_path, alerts)
+    for a in alerts:
+        print(f"🚨 {a['date']} {a['rule']} : {a['symbol']} = {a['value']:g} ({a['type']} {a['stat']:+.2f})")
+    print(f"✅ {len(engine.rules)} règles évaluées en {dt:.0f} ms, {len(alerts)} alerte(s) -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
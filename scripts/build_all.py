@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+import argparse
 import subprocess
 import sys
 
@@ -17,22 +18,52 @@ def run_step(module: str) -> None:
         sys.exit(ret)
 
 
-def main() -> None:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Régénère toutes les données + PNG.")
+    ap.add_argument(
+        "--no-prefetch", action="store_true",
+        help="pas de plan de fetch commun : chaque étape télécharge elle-même",
+    )
+    ap.add_argument(
+        "--shm", action=argparse.BooleanOptionalAction, default=None,
+        help="tableaux passés entre étapes en mémoire partagée (défaut : frames.shared_memory)",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
     steps = [
         "scripts.createdata",         # secteurs actions
         "scripts.createdata_macro",   # macro dashboard
         "scripts.createdata_rates",   # taux
         "scripts.createdata_credit",  # crédit
+        "scripts.alerts",             # alertes (nouvelles observations)
         "scripts.createvisu",         # visuel secteurs
         "scripts.createvisu_macro",   # visuel macro
         "scripts.createvisu_rates",   # visuel taux
         "scripts.createvisu_credit",  # visuel crédit
     ]
 
-    for mod in steps:
-        run_step(mod)
+    # 1 seul fetch par symbole distinct, toutes étapes confondues ;
+    # les étapes relisent ensuite le store local sans appel réseau.
+    if not args.no_prefetch:
+        from marketdash.planner import prefetch
+        prefetch(steps)
+
+    # mémoire partagée : les collectes publient leurs tableaux, les rendus
+    # les mappent sans copie ; les fichiers data/*.cols sont écrits à la fin
+    from marketdash.frames import flush_shared, shared_memory_enabled, start_shared_session
+    use_shm = shared_memory_enabled() if args.shm is None else args.shm
+    session = start_shared_session() if use_shm else None
+    try:
+        for mod in steps:
+            run_step(mod)
+    finally:
+        if session:
+            flush_shared(session)
 
-    print("✅ Build complet : CSV dans data/, images dans output/")
+    print("✅ Build complet : données dans data/, images dans output/")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
-to_remove = list((ROOT/"data").glob("*.csv")) + list((ROOT/"output").glob("*.png"))
+to_remove = (list((ROOT/"data").glob("*.csv")) + list((ROOT/"data").glob("*.cols"))
+             + list((ROOT/"output").glob("*.png")))
 
 for f in to_remove:
     try:
@@ -1,11 +1,17 @@
 from __future__ import annotations
 from datetime import datetime
 from pathlib import Path
+import argparse
 import pandas as pd
 
 from marketdash.config import load_config
-from marketdash.providers import yf_history  # TE dispo aussi si besoin
-from marketdash.utils import compute_perf_table, ensure_dir
+from marketdash.frames import write_frame
+from marketdash.fx import currency_of, fx_config, fx_ticker
+from marketdash.health import dead_symbols
+from marketdash.planner import FetchNeed
+from marketdash.providers import yf_history_many  # TE dispo aussi si besoin
+from marketdash.series import PriceSeries
+from marketdash.utils import compute_perf_history, compute_perf_table, compute_perf_table_chunked, ensure_dir
 
 # === Univers (modifiable sans toucher au moteur) ===
 SP500_SECTORS = {
@@ -42,28 +48,87 @@ STOXX600_SECTORS = {
     "Chemicals": "EXH6.DE",
 }
 
-def _collect_block(universe_name: str, mapping: dict[str,str], start: datetime, end: datetime) -> pd.DataFrame:
-    series_map = {}
-    for sector, ticker in mapping.items():
-        s = yf_history(ticker, start, end)
-        series_map[sector] = s
-    df = compute_perf_table(series_map, universe_name)
+def _series_block(mapping: dict[str,str], start: datetime, end: datetime) -> dict[str, PriceSeries]:
+    # un seul téléchargement groupé pour tout le bloc ; séries gardées en PriceSeries (pas de DataFrame)
+    px = yf_history_many(list(mapping.values()), start, end, as_frame=False)
+    return {sector: px[ticker] for sector, ticker in mapping.items()}
+
+def _currencies(mapping: dict[str,str]) -> dict[str, str | None]:
+    return {sector: currency_of(ticker) for sector, ticker in mapping.items()}
+
+def _collect_block(universe_name: str, mapping: dict[str,str], start: datetime, end: datetime,
+                   base_ccy: str | None = None, memory_mb: float | None = None) -> pd.DataFrame:
+    if memory_mb:
+        # univers gros : téléchargement + calcul par blocs de symboles ; sans
+        # mémo, un bloc calculé est libéré (le store garde les séries)
+        load = lambda syms: yf_history_many(syms, start, end, as_frame=False, use_memo=False)
+        return compute_perf_table_chunked(mapping, universe_name, load=load, memory_mb=memory_mb,
+                                          base_currency=base_ccy, currencies=_currencies(mapping))
+    df = compute_perf_table(_series_block(mapping, start, end), universe_name,
+                            base_currency=base_ccy, currencies=_currencies(mapping))
     return df
 
-def main():
+def _window() -> tuple[datetime, datetime]:
+    end = datetime.now()
+    return end.replace(year=end.year-2), end
+
+def fetch_plan() -> list[FetchNeed]:
+    """Tickers + fenêtre utilisés par main() (planification de build_all)."""
+    start, end = _window()
+    tickers = list(SP500_SECTORS.values()) + list(STOXX600_SECTORS.values())
+    base = fx_config().get("base_currency")
+    if base:
+        # changes nécessaires à la conversion des perfs
+        ccys = {currency_of(t) for t in tickers} | {base}
+        tickers += sorted(fx_ticker(c) for c in ccys if c and c != "EUR")
+    return [FetchNeed("yahoo", t, start, end) for t in tickers]
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Perfs secteurs SP 500 / Stoxx 600.")
+    ap.add_argument(
+        "--history", action="store_true",
+        help="écrit aussi sector_perf_history.cols (perfs à chaque date de l'historique)",
+    )
+    ap.add_argument(
+        "--memory-mb", type=float, default=None,
+        help="calcul des perfs par blocs de symboles, pic mémoire visé en Mo (univers plus gros que la RAM)",
+    )
+    ap.add_argument(
+        "--base-ccy", default=None,
+        help="devise des perfs (ex. EUR) ; défaut : fx.base_currency de config.yaml, sinon devise locale",
+    )
+    return ap.parse_args(argv)
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
     cfg = load_config()
     cache_dir = ensure_dir(cfg["cache_dir"])
 
-    end = datetime.now()
-    start = end.replace(year=end.year-2)
+    base = args.base_ccy or (cfg.get("fx") or {}).get("base_currency")
+
+    start, end = _window()
 
-    df_spx   = _collect_block("SP 500",    SP500_SECTORS,   start, end)
-    df_stoxx = _collect_block("Stoxx 600", STOXX600_SECTORS, start, end)
+    df_spx   = _collect_block("SP 500",    SP500_SECTORS,   start, end, base, args.memory_mb)
+    df_stoxx = _collect_block("Stoxx 600", STOXX600_SECTORS, start, end, base, args.memory_mb)
 
     df = pd.concat([df_spx, df_stoxx], ignore_index=True)
-    out = Path(cache_dir) / "sector_data.csv"
-    df.to_csv(out, index=False)
+    out = write_frame(df, Path(cache_dir) / "sector_data", index=False)
     print(f"✅ Saved data -> {out}")
 
+    if args.history:
+        hist = pd.concat([
+            compute_perf_history(_series_block(SP500_SECTORS, start, end), "SP 500",
+                                 base_currency=base, currencies=_currencies(SP500_SECTORS)),
+            compute_perf_history(_series_block(STOXX600_SECTORS, start, end), "Stoxx 600",
+                                 base_currency=base, currencies=_currencies(STOXX600_SECTORS)),
+        ], ignore_index=True)
+        out_h = write_frame(hist, Path(cache_dir) / "sector_perf_history", index=False)
+        print(f"✅ Saved history -> {out_h}")
+
+    universe = set(SP500_SECTORS.values()) | set(STOXX600_SECTORS.values())
+    dead = [d for d in dead_symbols("yahoo") if d["symbol"] in universe]
+    for d in dead:
+        print(f"⚠️ {d['symbol']} sans données ({d['failures']} échecs, prochain essai {d['next_probe']})")
+
 if __name__ == "__main__":
     main()
@@ -8,23 +8,26 @@ Séries utilisées (BofA Merrill Lynch / ICE indices) :
 - EU_HY_OAS  : BAMLHE00EHYIOAS
 - EM_HY_OAS  : BAMLEMHBHYCRPIOAS
 
-Sortie : data/credit_dashboard.csv
+Sortie : data/credit_dashboard.cols (format colonnes marketdash.frames ;
+         + .csv si frames.csv_export)
 """
 
 from __future__ import annotations
 
 from pathlib import Path
+import argparse
 import os
 import sys
 from typing import Dict
 
 import pandas as pd
-import requests
 
+from marketdash.frames import write_frame
+from marketdash.providers import FRED_HOST, fred_history
+from marketdash.planner import FetchNeed
+from marketdash.scheduler import FetchScheduler
 from marketdash.utils import ensure_dir
 
-FRED_URL = "https://api.stlouisfed.org/fred/series/observations"
-
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ensure_dir(ROOT / "data")
 
@@ -36,32 +39,25 @@ FRED_CREDIT_SERIES: Dict[str, str] = {
 }
 
 
-def fetch_fred_series(series_id: str, start: str, api_key: str) -> pd.Series:
-    params = {
-        "series_id": series_id,
-        "observation_start": start,
-        "api_key": api_key,
-        "file_type": "json",
-    }
+START = "2010-01-01"
 
-    r = requests.get(FRED_URL, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
 
-    obs = data.get("observations", [])
-    if not obs:
-        return pd.Series(dtype="float64")
+def fetch_plan() -> list[FetchNeed]:
+    """Séries FRED utilisées par main() (planification de build_all)."""
+    return [FetchNeed("fred", fred_id, START) for fred_id in FRED_CREDIT_SERIES.values()]
 
-    dates = [o["date"] for o in obs]
-    values = [o["value"] for o in obs]
 
-    s = pd.Series(values, index=pd.to_datetime(dates))
-    s = pd.to_numeric(s, errors="coerce")
-    s.name = series_id
-    return s.dropna()
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument(
+        "--full", action="store_true",
+        help="re-télécharge tout l'historique au lieu de compléter le store local",
+    )
+    return ap.parse_args(argv)
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
     api_key = os.environ.get("FRED_API_KEY")
     if not api_key:
         print(
@@ -70,14 +66,25 @@ def main() -> None:
         )
         sys.exit(1)
 
-    start = "2010-01-01"
+    start = START
     print(f"📥 Download credit OAS from FRED since {start} ...")
 
     all_series = {}
 
-    for label, fred_id in FRED_CREDIT_SERIES.items():
+    # toutes les séries partent d'un coup ; le scheduler limite le débit FRED
+    with FetchScheduler.from_config() as sched:
+        futures = {
+            label: sched.submit(
+                FRED_HOST, fred_history, fred_id,
+                start=start, api_key=api_key, incremental=not args.full,
+            )
+            for label, fred_id in FRED_CREDIT_SERIES.items()
+        }
+
+    for label, fut in futures.items():
+        fred_id = FRED_CREDIT_SERIES[label]
         try:
-            s = fetch_fred_series(fred_id, start=start, api_key=api_key)
+            s = fut.result()
         except Exception as e:
             print(f"⚠️ FRED error for {label} ({fred_id}): {e}")
             continue
@@ -97,8 +104,7 @@ def main() -> None:
     df.sort_index(inplace=True)
     df.index.name = "date"
 
-    out_path = DATA_DIR / "credit_dashboard.csv"
-    df.to_csv(out_path)
+    out_path = write_frame(df, DATA_DIR / "credit_dashboard")
     print(f"✅ Saved credit -> {out_path}")
 
 
@@ -1,11 +1,21 @@
 from pathlib import Path
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from marketdash.frames import write_frame
+from marketdash.fx import currency_of, fx_config, fx_ticker, translate_frame
+from marketdash.health import dead_symbols
+from marketdash.perf import PricePanel
+from marketdash.planner import FetchNeed
+from marketdash.providers import yf_history_many
+from marketdash.rolling import rolling_stats
 
 OUT = Path("data")
 OUT.mkdir(exist_ok=True, parents=True)
 
+VOL_WINDOW = 63  # vol / corrélations glissantes : ~3 mois de barres
+
 # ============================================================
 # Univers macro : groupes + tickers Yahoo Finance
 # (tu peux ajuster les tickers si besoin)
@@ -77,39 +87,39 @@ MACRO_GROUPS = {
 # ============================================================
 # Fonctions de calcul
 # ============================================================
-def pct_change_window(s: pd.Series, days: int) -> float:
-    if s.empty:
-        return float("nan")
-    end = s.index[-1]
-    ref = s.loc[: end - timedelta(days=days)]
-    if ref.empty:
-        return float("nan")
-    p0 = float(ref.iloc[-1])
-    p1 = float(s.iloc[-1])
-    if p0 == 0:
-        return float("nan")
-    return (p1 / p0 - 1.0) * 100.0
-
-
-def ytd_change(s: pd.Series) -> float:
-    if s.empty:
-        return float("nan")
-    d0 = pd.Timestamp(year=s.index[-1].year, month=1, day=1)
-    ref = s.loc[:d0]
-    if ref.empty:
-        return float("nan")
-    p0 = float(ref.iloc[-1])
-    p1 = float(s.iloc[-1])
-    if p0 == 0:
-        return float("nan")
-    return (p1 / p0 - 1.0) * 100.0
+def window_perfs(px: pd.DataFrame, days: int = 7):
+    """
+    Niveau, perf sur `days` jours calendaires et perf YTD de chaque colonne,
+    en une passe sur le panel (référence = dernier point <= date de réf.).
+    """
+    pp = PricePanel.from_frame(px)
+    last = pp.last_dates()
+    lastwk = pp.perf_vs(last - np.timedelta64(days, "D"))
+    ytd = pp.perf_vs(last.astype("datetime64[Y]"))  # 1er janvier de l'année du dernier point
+    return pp.level(), lastwk, ytd
 
 
 # ============================================================
 # Main
 # ============================================================
+def _window():
+    end = datetime.today()
+    return end - timedelta(days=370), end
+
+
+def fetch_plan():
+    """Tickers + fenêtre utilisés par main() (planification de build_all)."""
+    start, end = _window()
+    tickers = {t for lst in MACRO_GROUPS.values() for (_, t) in lst}
+    base = fx_config().get("base_currency")
+    if base:
+        ccys = {currency_of(t) for t in tickers} | {base}
+        tickers |= {fx_ticker(c) for c in ccys if c and c != "EUR"}
+    return [FetchNeed("yahoo", t, start, end) for t in sorted(tickers)]
+
+
 def main():
-    start = (datetime.today() - timedelta(days=370)).strftime("%Y-%m-%d")
+    start, end = _window()
 
     # liste (groupe, nom, ticker)
     items = [
@@ -120,36 +130,51 @@ def main():
 
     tickers = list({t for _, _, t in items})
 
-    px = yf.download(
-        tickers,
-        start=start,
-        progress=False,
-        auto_adjust=False,
-    )
+    # store local + téléchargement groupé : seules les queues manquantes partent
+    px = yf_history_many(tickers, start, end)
 
-    # colonne de prix
-    if "Adj Close" in px:
-        px = px["Adj Close"]
-    else:
-        px = px["Close"]
+    level, lastwk, ytd = window_perfs(px, 7)
+    base = fx_config().get("base_currency")
+    if base:
+        # perfs dans la devise de référence ; le niveau reste en devise locale
+        _, lastwk, ytd = window_perfs(translate_frame(px, base), 7)
+    col = {t: i for i, t in enumerate(px.columns)}
 
-    # drop des colonnes totalement vides
-    px = px.dropna(how="all", axis=1)
+    # vol réalisée + corrélations : état glissant persistant, seules les nouvelles barres sont poussées
+    stats = rolling_stats(px, "macro", window=VOL_WINDOW)
+    vol = stats.vol()
 
-    rows = []
-    for grp, name, t in items:
-        s = px[t].dropna() if t in px.columns else pd.Series(dtype=float)
-        level = float(s.iloc[-1]) if not s.empty else float("nan")
-        lastwk = pct_change_window(s, 7)
-        ytd = ytd_change(s)
-        rows.append((grp, name, level, lastwk, ytd))
+    rows = [
+        (grp, name, level[col[t]], lastwk[col[t]], ytd[col[t]], vol[t])
+        for grp, name, t in items
+    ]
 
     df = pd.DataFrame(
         rows,
-        columns=["Groupe", "Libellé", "Niveau", "LastWeek", "PerfYTD"],
+        columns=["Groupe", "Libellé", "Niveau", "LastWeek", "PerfYTD", "Vol3M"],
     )
-    df.to_csv(OUT / "macro_dashboard.csv", index=False, encoding="utf-8-sig")
-    print(f"✅ Saved data -> {OUT/'macro_dashboard.csv'}")
+    out = write_frame(df, OUT / "macro_dashboard", index=False, encoding="utf-8-sig")
+    print(f"✅ Saved data -> {out}")
+
+    # matrice de corrélation (libellés, ordre du dashboard)
+    names = {}
+    for _, name, t in items:
+        names.setdefault(t, name)
+    order = list(names)
+    corr = stats.corr().loc[order, order].rename(index=names, columns=names)
+    corr.index.name = "label"
+    out = write_frame(corr, OUT / "macro_corr", encoding="utf-8-sig")
+    print(f"✅ Saved correlations -> {out}")
+    _report_dead(tickers)
+
+
+def _report_dead(tickers: list[str]) -> None:
+    wanted = set(tickers)
+    dead = [d for d in dead_symbols("yahoo") if d["symbol"] in wanted]
+    if dead:
+        print("⚠️ Symboles sans données (re-test différé) :")
+        for d in dead:
+            print(f"  - {d['symbol']} ({d['failures']} échecs, prochain essai {d['next_probe']})")
 
 
 if __name__ == "__main__":
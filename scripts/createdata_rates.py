@@ -1,28 +1,33 @@
 """
-Collecte des taux souverains via FRED et construction d'un CSV unique.
+Collecte des taux souverains via FRED et construction d'un tableau unique.
 
 - Courbe US : 1M, 3M, 6M, 1Y, 2Y, 3Y, 5Y, 7Y, 10Y, 20Y, 30Y
 - Bund 10Y  : Allemagne
 - OAT 10Y   : France
 
-Sortie : data/rates_fred.csv
+Sorties : data/rates_fred.cols
+          data/rates_ns.cols (paramètres Nelson–Siegel de la courbe US, par date)
+(format colonnes marketdash.frames ; + .csv si frames.csv_export)
 """
 
 from __future__ import annotations
 
 from datetime import datetime
 from pathlib import Path
+import argparse
 import os
 import sys
 from typing import Dict
 
 import pandas as pd
-import requests
 
+from marketdash.curves import fit_ns_cached
+from marketdash.frames import write_frame
+from marketdash.providers import FRED_HOST, fred_history
+from marketdash.planner import FetchNeed
+from marketdash.scheduler import FetchScheduler
 from marketdash.utils import ensure_dir
 
-FRED_URL = "https://api.stlouisfed.org/fred/series/observations"
-
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ensure_dir(ROOT / "data")
 
@@ -47,35 +52,25 @@ FRED_SERIES: Dict[str, str] = {
 }
 
 
-def fetch_fred_series(series_id: str, start: str, api_key: str) -> pd.Series:
-    """
-    Télécharge une série FRED et renvoie un Series(date -> valeur float).
-    """
-    params = {
-        "series_id": series_id,
-        "observation_start": start,
-        "api_key": api_key,
-        "file_type": "json",
-    }
+START = "2010-01-01"
 
-    r = requests.get(FRED_URL, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json()
 
-    obs = data.get("observations", [])
-    if not obs:
-        return pd.Series(dtype="float64")
+def fetch_plan() -> list[FetchNeed]:
+    """Séries FRED utilisées par main() (planification de build_all)."""
+    return [FetchNeed("fred", fred_id, START) for fred_id in FRED_SERIES.values()]
 
-    dates = [o["date"] for o in obs]
-    values = [o["value"] for o in obs]
 
-    s = pd.Series(values, index=pd.to_datetime(dates))
-    s = pd.to_numeric(s, errors="coerce")  # "." -> NaN
-    s.name = series_id
-    return s.dropna()
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument(
+        "--full", action="store_true",
+        help="re-télécharge tout l'historique au lieu de compléter le store local",
+    )
+    return ap.parse_args(argv)
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
     api_key = os.environ.get("FRED_API_KEY")
     if not api_key:
         print(
@@ -84,14 +79,25 @@ def main() -> None:
         )
         sys.exit(1)
 
-    start = "2010-01-01"
+    start = START
 
     all_series = {}
     print(f"📥 Download rates from FRED since {start} ...")
 
-    for label, fred_id in FRED_SERIES.items():
+    # toutes les séries partent d'un coup ; le scheduler limite le débit FRED
+    with FetchScheduler.from_config() as sched:
+        futures = {
+            label: sched.submit(
+                FRED_HOST, fred_history, fred_id,
+                start=start, api_key=api_key, incremental=not args.full,
+            )
+            for label, fred_id in FRED_SERIES.items()
+        }
+
+    for label, fut in futures.items():
+        fred_id = FRED_SERIES[label]
         try:
-            s = fetch_fred_series(fred_id, start=start, api_key=api_key)
+            s = fut.result()
         except Exception as e:  # pragma: no cover
             print(f"  - {label} ({fred_id}) ... ERROR: {e}")
             continue
@@ -111,10 +117,14 @@ def main() -> None:
     df.sort_index(inplace=True)
     df.index.name = "date"
 
-    out_path = DATA_DIR / "rates_fred.csv"
-    df.to_csv(out_path)
+    out_path = write_frame(df, DATA_DIR / "rates_fred")
     print(f"✅ Saved rates -> {out_path}")
 
+    # courbe US ajustée à chaque date (seules les nouvelles dates sont ré-ajustées)
+    params = fit_ns_cached(df, key="us_ns")
+    ns_path = write_frame(params, DATA_DIR / "rates_ns")
+    print(f"✅ Saved Nelson-Siegel params -> {ns_path}")
+
 
 if __name__ == "__main__":
     main()
@@ -6,7 +6,10 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
-import yfinance as yf
+
+from marketdash.perf import PricePanel
+from marketdash.planner import FetchNeed
+from marketdash.providers import yf_history_many
 
 from pathlib import Path
 
@@ -89,51 +92,19 @@ def last_business_day(dt: datetime) -> datetime:
     return dt
 
 
-def _load_price_series(ticker: str, start: datetime, end: datetime) -> pd.Series:
-    """Télécharge une série quotidienne robuste (gère Adj Close / Close)."""
-    df = yf.download(
-        ticker,
-        start=start.strftime("%Y-%m-%d"),
-        end=(end + timedelta(days=1)).strftime("%Y-%m-%d"),
-        progress=False,
-        auto_adjust=False,
-        group_by="column",
-        interval="1d",
-    )
-    if df is None or df.empty:
-        return pd.Series(dtype=float)
+def _window() -> Tuple[datetime, datetime]:
+    """Fenêtre de prix nécessaire aux perfs 5D / 1M / YTD."""
+    today = last_business_day(datetime.now())
+    d_1m = today - relativedelta(months=1)
+    y0 = last_business_day(datetime(today.year - 1, 12, 31))
+    return min(d_1m, y0) - timedelta(days=10), today
 
-    if "Adj Close" in df:
-        s = df["Adj Close"].dropna()
-    elif "Close" in df:
-        s = df["Close"].dropna()
-    else:
-        s = None
-        for c in df.columns:
-            ser = pd.to_numeric(df[c], errors="coerce").dropna()
-            if not ser.empty:
-                s = ser
-                break
-        if s is None:
-            return pd.Series(dtype=float)
-
-    s.index = pd.to_datetime(s.index).tz_localize(None)
-    return s.astype(float)
-
-
-def _perf_pct(series: pd.Series, ref_date: datetime) -> float:
-    """Perf % vs dernier point <= ref_date."""
-    s = series.dropna()
-    if s.empty:
-        return np.nan
-    s_ref = s.loc[:ref_date]
-    if s_ref.empty:
-        return np.nan
-    p0 = float(s_ref.iloc[-1])
-    p1 = float(s.iloc[-1])
-    if p0 == 0:
-        return np.nan
-    return (p1 / p0 - 1.0) * 100.0
+
+def fetch_plan() -> List[FetchNeed]:
+    """Tickers + fenêtre utilisés par le visuel (planification de build_all)."""
+    start, today = _window()
+    tickers = list(SP500_SECTORS.values()) + list(STOXX600_SECTORS.values())
+    return [FetchNeed("yahoo", t, start, today) for t in tickers]
 
 
 def compute_rows(
@@ -148,18 +119,22 @@ def compute_rows(
     d_5d = today - timedelta(days=7)
     d_1m = today - relativedelta(months=1)
     y0 = last_business_day(datetime(today.year - 1, 12, 31))
-    start = min(d_1m, y0) - timedelta(days=10)
+    start, _ = _window()
+
+    # un seul panel (téléchargement groupé) pour tout l'univers
+    px = yf_history_many(list(universe.values()), start, today)
+
+    # perfs vs dernier point <= date de réf., toutes colonnes d'un coup
+    pp = PricePanel.from_frame(px)
+    p5d = pp.perf_vs(np.datetime64(d_5d))
+    p1m = pp.perf_vs(np.datetime64(d_1m))
+    pytd = pp.perf_vs(np.datetime64(y0))
+    col = {t: i for i, t in enumerate(pp.labels)}
 
     out = []
     for name, ticker in universe.items():
-        s = _load_price_series(ticker, start, today)
-        if s.empty:
-            out.append((name, np.nan, np.nan, np.nan))
-            continue
-        p5d = _perf_pct(s, d_5d)
-        p1m = _perf_pct(s, d_1m)
-        pytd = _perf_pct(s, y0)
-        out.append((name, p5d, p1m, pytd))
+        j = col[ticker]
+        out.append((name, p5d[j], p1m[j], pytd[j]))
 
     return out
 
@@ -4,6 +4,10 @@ from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from marketdash.derived import add_derived
+from marketdash.frames import frame_exists, frame_path
+from marketdash.query import frame_panel
+
 START_PLOT = pd.Timestamp("2020-10-01")
 CREDIT_COLOR = "#d79b00"
 
@@ -14,16 +18,14 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def load_credit_df() -> pd.DataFrame:
-    csv_path = DATA_DIR / "credit_dashboard.csv"
-    if not csv_path.exists():
+    path = DATA_DIR / "credit_dashboard"
+    if not frame_exists(path):
         raise FileNotFoundError(
-            f"{csv_path} introuvable. Lance d'abord : python -m scripts.createdata_credit"
+            f"{frame_path(path)} introuvable. Lance d'abord : python -m scripts.createdata_credit"
         )
 
-    df = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
-    df = df.loc[df.index >= START_PLOT]
-    # 🔁 hebdo : un point par semaine (vendredi)
-    df_w = df.resample("W-FRI").last().dropna(how="all")
+    # 🔁 hebdo : un point par semaine (vendredi), vue mémoïsée sur le tableau
+    df_w = frame_panel(path, start=START_PLOT, freq="W-FRI")
     return df_w
 
 
@@ -64,8 +66,15 @@ def plot_em_hy(ax: plt.Axes, df: pd.DataFrame) -> None:
     ax.grid(True, axis="y", linewidth=0.5, alpha=0.6)
 
 
+def plot_us_hy_ig(ax: plt.Axes, df: pd.DataFrame) -> None:
+    ax.plot(df.index, df["US_HY_IG"], color=CREDIT_COLOR, linewidth=2)
+    ax.set_ylabel("bps")
+    ax.set_title("US HY - IG")
+    ax.grid(True, axis="y", linewidth=0.5, alpha=0.6)
+
+
 def main() -> None:
-    df_m = load_credit_df()
+    df_m = add_derived(load_credit_df(), cache_key="credit_w")
 
     # 1) iTraxx Europe HY
     fig1, ax1 = plt.subplots(figsize=(6, 4))
@@ -87,6 +96,12 @@ def main() -> None:
     plot_em_hy(ax4, df_m)
     save_fig(fig4, "credit_em_hy.png")
 
+    # 4b) différentiel HY - IG US (série dérivée)
+    if "US_HY_IG" in df_m:
+        fig5, ax5 = plt.subplots(figsize=(6, 4))
+        plot_us_hy_ig(ax5, df_m)
+        save_fig(fig5, "credit_us_hy_ig.png")
+
     # 5) Dashboard 2x2
     fig, axes = plt.subplots(2, 2, figsize=(12, 7))
     ax_tl, ax_tr = axes[0]
@@ -8,6 +8,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 
+from marketdash.frames import frame_exists, read_frame
+
 # ======================================================================
 #  Chemins
 # ======================================================================
@@ -229,9 +231,25 @@ GROUP_LABELS = {
     "Matières 1ères": "Matières 1ères",
 }
 
+def draw_corr_heatmap(corr: pd.DataFrame, out: Path) -> None:
+    """Heatmap des corrélations glissantes (macro_corr.cols)."""
+    n = len(corr)
+    fig, ax = plt.subplots(figsize=(2 + 0.28 * n, 1.5 + 0.28 * n), dpi=DPI)
+    im = ax.imshow(corr.to_numpy(dtype=float), cmap="RdBu_r", vmin=-1, vmax=1)
+    ax.set_xticks(range(n))
+    ax.set_yticks(range(n))
+    ax.set_xticklabels(corr.columns, rotation=90, fontsize=7)
+    ax.set_yticklabels(corr.index, fontsize=7)
+    ax.set_title("Corrélations 3 mois (rendements journaliers)", color=COLOR_BLUE, weight="bold")
+    fig.colorbar(im, ax=ax, fraction=0.04, pad=0.02)
+    fig.savefig(out, dpi=DPI, bbox_inches="tight")
+    plt.close(fig)
+    print(f"Saved {out}")
+
+
 def main():
     data_dir, output_dir = get_paths()
-    df = pd.read_csv(data_dir / "macro_dashboard.csv")
+    df = read_frame(data_dir / "macro_dashboard")
 
     for col in ("Niveau", "LastWeek", "PerfYTD"):
         df[col] = pd.to_numeric(df[col], errors="coerce")
@@ -283,6 +301,11 @@ def main():
     plt.close(fig)
     print(f"Saved {out}")
 
+    corr_path = data_dir / "macro_corr"
+    if frame_exists(corr_path):
+        corr = read_frame(corr_path)
+        draw_corr_heatmap(corr, output_dir / "macro_corr_heatmap.png")
+
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,11 @@ from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from marketdash.curves import US_TENORS, ns_yields
+from marketdash.derived import add_derived
+from marketdash.frames import frame_exists, frame_path, read_frame
+from marketdash.query import frame_panel
+
 US_COLOR = "#d79b00"
 DE_COLOR = "#003f6f"
 
@@ -16,21 +21,27 @@ OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def load_rates_df() -> pd.DataFrame:
-    csv_path = DATA_DIR / "rates_fred.csv"
-    if not csv_path.exists():
+    path = DATA_DIR / "rates_fred"
+    if not frame_exists(path):
         raise FileNotFoundError(
-            f"{csv_path} introuvable. Lance d'abord : python -m scripts.createdata_rates"
+            f"{frame_path(path)} introuvable. Lance d'abord : python -m scripts.createdata_rates"
         )
 
-    df = pd.read_csv(csv_path, parse_dates=["date"], index_col="date")
-    # filtre sur la période voulue
-    df = df.loc[df.index >= START_PLOT]
-    # 🔁 on passe en hebdo : un point par semaine (vendredi)
-    df_w = df.resample("W-FRI").last().dropna(how="all")
+    # 🔁 hebdo (vendredi) depuis START_PLOT : vue mémoïsée sur le tableau,
+    # seule la queue est recalculée après un refresh
+    df_w = frame_panel(path, start=START_PLOT, freq="W-FRI")
     return df_w
 
 
 
+def load_ns_params() -> pd.DataFrame | None:
+    """Paramètres Nelson–Siegel écrits par createdata_rates (None si absents)."""
+    path = DATA_DIR / "rates_ns"
+    if not frame_exists(path):
+        return None
+    return read_frame(path).dropna()
+
+
 def save_fig(fig: plt.Figure, filename: str) -> None:
     out_path = OUTPUT_DIR / filename
     fig.tight_layout()
@@ -39,7 +50,7 @@ def save_fig(fig: plt.Figure, filename: str) -> None:
     print(f"Saved {out_path}")
 
 
-def plot_yield_curve(ax: plt.Axes, last_row: pd.Series) -> None:
+def plot_yield_curve(ax: plt.Axes, last_row: pd.Series, ns_params: pd.DataFrame | None = None) -> None:
     tenor_cols = [
         ("US_1M", "1M"), ("US_3M", "3M"), ("US_6M", "6M"),
         ("US_1Y", "1Y"), ("US_2Y", "2Y"), ("US_3Y", "3Y"),
@@ -55,6 +66,16 @@ def plot_yield_curve(ax: plt.Axes, last_row: pd.Series) -> None:
 
     ax.plot(xs, us_y, marker="s", linewidth=2, color=US_COLOR, label="Taux US")
 
+    # courbe ajustée (Nelson–Siegel) à la date du dernier point, et un an avant
+    if ns_params is not None and len(ns_params):
+        cols = [col for col, label in tenor_cols if label in xs]
+        for ref, style, lbl in ((last_row.name, "-", "NS"), (last_row.name - pd.DateOffset(years=1), "--", "NS -1 an")):
+            p = ns_params.loc[:ref]
+            if p.empty:
+                continue
+            fitted = ns_yields(p.iloc[[-1]], {c: US_TENORS[c] for c in cols}).iloc[0]
+            ax.plot(xs, fitted.values, linestyle=style, linewidth=1, color="grey", label=lbl)
+
     if "Bund_10Y" in last_row.index and pd.notna(last_row["Bund_10Y"]):
         de_y = [last_row["Bund_10Y"]] * len(xs)
         ax.plot(xs, de_y, marker="s", linewidth=2, color=DE_COLOR, label="Taux Allemands")
@@ -62,7 +83,7 @@ def plot_yield_curve(ax: plt.Axes, last_row: pd.Series) -> None:
     ax.set_ylabel("%")
     ax.set_title("Courbe des taux")
     ax.grid(True, axis="y", linewidth=0.5, alpha=0.6)
-    ax.legend(loc="upper center", bbox_to_anchor=(0.5, -0.25), ncol=2, frameon=False)
+    ax.legend(loc="upper center", bbox_to_anchor=(0.5, -0.25), ncol=4, frameon=False)
 
 
 def plot_10y(ax: plt.Axes, df: pd.DataFrame) -> None:
@@ -75,7 +96,7 @@ def plot_10y(ax: plt.Axes, df: pd.DataFrame) -> None:
 
 
 def plot_spread_de(ax: plt.Axes, df: pd.DataFrame) -> None:
-    spread = (df["OAT_10Y"] - df["Bund_10Y"]) * 100.0
+    spread = df["FR_DE_10Y"]  # série dérivée (config.yaml : derived)
     ax.plot(spread.index, spread, color=DE_COLOR, linewidth=2)
     ax.axhline(0, color="black", linewidth=0.8)
     ax.set_ylabel("bps")
@@ -84,7 +105,7 @@ def plot_spread_de(ax: plt.Axes, df: pd.DataFrame) -> None:
 
 
 def plot_spread_us(ax: plt.Axes, df: pd.DataFrame) -> None:
-    spread = (df["US_10Y"] - df["US_2Y"]) * 100.0
+    spread = df["US_2s10s"]
     ax.plot(spread.index, spread, color=US_COLOR, linewidth=2)
     ax.axhline(0, color="black", linewidth=0.8)
     ax.set_ylabel("bps")
@@ -93,12 +114,14 @@ def plot_spread_us(ax: plt.Axes, df: pd.DataFrame) -> None:
 
 
 def main() -> None:
-    df_m = load_rates_df()
+    # spreads calculés une fois (queue seulement, cf. marketdash.derived) puis réutilisés
+    df_m = add_derived(load_rates_df(), cache_key="rates_w")
     last_row = df_m.iloc[-1]
+    ns_params = load_ns_params()
 
     # 1) Courbe
     fig1, ax1 = plt.subplots(figsize=(6, 4))
-    plot_yield_curve(ax1, last_row)
+    plot_yield_curve(ax1, last_row, ns_params)
     save_fig(fig1, "rates_curve.png")
 
     # 2) 10 ans
@@ -121,7 +144,7 @@ def main() -> None:
     ax_curve, ax_de = axes[0]
     ax_10y, ax_us = axes[1]
 
-    plot_yield_curve(ax_curve, last_row)
+    plot_yield_curve(ax_curve, last_row, ns_params)
     plot_spread_de(ax_de, df_m)
     plot_10y(ax_10y, df_m)
     plot_spread_us(ax_us, df_m)